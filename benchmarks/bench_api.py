@@ -0,0 +1,257 @@
+"""Latency, throughput and allocation benchmarks for the fleet lookup path.
+
+Drives ``find_spec``, ``find_suggested_agencies`` and ``get_fleet_spec``
+in-process, and ``/api/fleet`` through the ASGI app with an httpx client,
+using a realistic mix of bus IDs: hits, misses, IDs claimed by several
+agencies, and non-numeric input. Run from the repository root::
+
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --agencies 500 --ranges 40 --requests 5000
+    python benchmarks/bench_api.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_api.py --compare benchmarks/baseline.json
+
+``--compare`` exits with status 1 when any scenario's p50 latency regresses
+by more than ``--tolerance``.
+
+Memory per in-process request is reported two ways, from a separate
+tracemalloc pass. ``peak KiB`` is the high-water mark above the starting
+point, which is the transient working set. ``kept blk`` and ``kept B`` are
+the blocks and bytes still allocated after the pass, from a snapshot diff
+divided by the request count, which is what caches and leaks keep.
+CPython does not count short-lived allocations, so neither is a count of
+every allocation made.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import synthetic_fleets, write_fleet_source  # noqa: E402
+
+MIX = (("hit", 0.6), ("miss", 0.2), ("collision", 0.15), ("invalid", 0.05))
+INVALID_IDS = ("abc", "", "12A3", "5300-B-", "  ", "0x1F")
+
+
+def build_workload(main, count: int, seed: int) -> list[tuple[str, str, str]]:
+    """Return ``(kind, agency_key, bus_id)`` lookups following ``MIX``."""
+    rng = random.Random(seed)
+    snapshot = main.current_snapshot()
+    fleets = list(snapshot.fleets.values())
+    collisions = [
+        (lo, hi, covering)
+        for lo, hi, covering in snapshot.coverage.segments()
+        if len(covering) > 1
+    ]
+    top = max(hi for fleet in fleets for _, hi, _ in fleet.index.segments()) + 100
+
+    workload: list[tuple[str, str, str]] = []
+    kinds = [kind for kind, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    for kind in rng.choices(kinds, weights, k=count):
+        fleet = rng.choice(fleets)
+        if kind == "hit":
+            lo, hi, _ = rng.choice(list(fleet.index.segments()))
+            bus_id = str(rng.randint(lo, hi))
+        elif kind == "miss":
+            bus_id = str(rng.randint(0, top))
+            while fleet.index.lookup(int(bus_id)) is not None:
+                bus_id = str(rng.randint(0, top))
+        elif kind == "collision" and collisions:
+            lo, hi, covering = rng.choice(collisions)
+            bus_id = str(rng.randint(lo, hi))
+            # Ask the agency that does not own it half the time, to hit the suggestion path.
+            fleet = rng.choice(fleets) if rng.random() < 0.5 else covering[0][0]
+        else:
+            kind = "invalid"
+            bus_id = rng.choice(INVALID_IDS)
+        workload.append((kind, fleet.key, bus_id))
+    return workload
+
+
+def summarize(latencies: list[float], elapsed: float, memory: dict[str, float] | None = None) -> dict[str, float]:
+    ordered = sorted(latencies)
+    result = {
+        "p50_us": statistics.median(ordered) * 1e6,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+        "rps": len(ordered) / elapsed,
+    }
+    result.update(memory or {})
+    return result
+
+
+def measure_memory(call: Callable[[str, str], object], sample: list[tuple[str, str, str]]) -> dict[str, float]:
+    """Per-request peak above the starting point, and blocks and bytes still held after ``sample``."""
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+    tracemalloc.start()
+    peaks = 0
+    before = tracemalloc.take_snapshot().filter_traces(ignore)
+    for _, agency, bus_id in sample:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        call(agency, bus_id)
+        peaks += tracemalloc.get_traced_memory()[1] - base
+    after = tracemalloc.take_snapshot().filter_traces(ignore)
+    tracemalloc.stop()
+    kept = after.compare_to(before, "filename")
+    return {
+        "peak_kib_per_req": peaks / len(sample) / 1024,
+        "kept_blocks_per_req": sum(stat.count_diff for stat in kept) / len(sample),
+        "kept_bytes_per_req": sum(stat.size_diff for stat in kept) / len(sample),
+    }
+
+
+def run_sync(call: Callable[[str, str], object], workload: list[tuple[str, str, str]]) -> dict[str, float]:
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for _, agency, bus_id in workload:
+        t0 = time.perf_counter()
+        call(agency, bus_id)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    # The memory pass is separate: tracemalloc would distort the timings above.
+    return summarize(latencies, elapsed, measure_memory(call, workload[: min(len(workload), 500)]))
+
+
+def in_process_scenarios(main) -> dict[str, Callable[[str, str], object]]:
+    from fastapi import HTTPException
+    from starlette.requests import Request
+
+    fleets = main.current_snapshot().fleets
+    request = Request({"type": "http", "method": "GET", "path": "/api/fleet", "headers": [], "query_string": b""})
+
+    def find_spec(agency: str, bus_id: str) -> object:
+        try:
+            return main.find_spec(bus_id, fleets[agency].index)
+        except ValueError:
+            return None
+
+    def find_suggested(agency: str, bus_id: str) -> object:
+        try:
+            return main.find_suggested_agencies(bus_id, agency)
+        except ValueError:
+            return None
+
+    def handler(agency: str, bus_id: str) -> object:
+        try:
+            return main.get_fleet_spec(request, agency, bus_id, None)
+        except HTTPException as exc:
+            return exc
+
+    return {"find_spec": find_spec, "find_suggested_agencies": find_suggested, "get_fleet_spec": handler}
+
+
+async def run_asgi(main, workload: list[tuple[str, str, str]]) -> dict[str, float]:
+    import re
+
+    import httpx
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        page = await client.get("/")
+        match = re.search(r'name="csrf-token" content="([^"]*)"', page.text)
+        token = (match.group(1) if match else "") or client.cookies.get(main.CSRF_COOKIE_NAME, "")
+        headers = {"X-CSRF-Token": token, "Origin": "http://testserver"}
+
+        latencies: list[float] = []
+        started = time.perf_counter()
+        for _, agency, bus_id in workload:
+            t0 = time.perf_counter()
+            response = await client.get("/api/fleet", params={"agency": agency, "busId": bus_id}, headers=headers)
+            latencies.append(time.perf_counter() - t0)
+            if response.status_code in (401, 403):
+                raise SystemExit(f"ASGI benchmark was rejected: {response.status_code} {response.text}")
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed)
+
+
+def compare(results: dict[str, dict[str, float]], baseline_path: Path, tolerance: float) -> bool:
+    baseline = json.loads(baseline_path.read_text())["results"]
+    ok = True
+    print(f"\nvs {baseline_path}:")
+    for name, metrics in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            print(f"  {name:<28} (no baseline)")
+            continue
+        ratio = metrics["p50_us"] / previous["p50_us"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        ok &= flag == "ok"
+        print(f"  {name:<28} p50 {ratio:>6.2f}x  p99 {metrics['p99_us'] / previous['p99_us']:>6.2f}x  {flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agencies", type=int, default=0, help="synthetic agencies (0 uses data/fleets.json)")
+    parser.add_argument("--ranges", type=int, default=40, help="ranges per synthetic agency")
+    parser.add_argument("--requests", type=int, default=3000, help="lookups per scenario")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--csrf-mode", choices=("session", "stateless"), default="session")
+    parser.add_argument("--skip-asgi", action="store_true", help="only run the in-process scenarios")
+    parser.add_argument("--save-baseline", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown for --compare")
+    args = parser.parse_args()
+
+    os.environ["CSRF_MODE"] = args.csrf_mode
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.agencies:
+            source = write_fleet_source(
+                synthetic_fleets(args.agencies, args.ranges, args.seed), Path(scratch) / "fleets.json"
+            )
+            os.environ["FLEET_DATA_SOURCE"] = str(source)
+            os.environ["FLEET_DATA_PATH"] = str(Path(scratch) / "fleets.bin")
+            os.environ["FLEET_SNAPSHOT_PATH"] = str(Path(scratch) / "snapshot.bin")
+
+        started = time.perf_counter()
+        import main as app_module
+
+        startup = time.perf_counter() - started
+        snapshot = app_module.current_snapshot()
+        total_ranges = sum(len(fleet.ranges) for fleet in snapshot.fleets.values())
+        print(
+            f"{len(snapshot.fleets)} agencies, {total_ranges} ranges, "
+            f"{len(snapshot.coverage)} coverage segments; import + build {startup * 1e3:.0f} ms"
+        )
+
+        workload = build_workload(app_module, args.requests, args.seed)
+        results: dict[str, dict[str, float]] = {}
+        for name, call in in_process_scenarios(app_module).items():
+            results[name] = run_sync(call, workload)
+        if not args.skip_asgi:
+            results["asgi /api/fleet"] = asyncio.run(run_asgi(app_module, workload))
+
+    print(f"\n{'scenario':<28} {'p50':>10} {'p99':>10} {'req/s':>10} {'peak KiB':>9} {'kept blk':>9} {'kept B':>8}")
+    for name, metrics in results.items():
+        memory = ""
+        if "peak_kib_per_req" in metrics:
+            memory = (
+                f" {metrics['peak_kib_per_req']:>9.2f} {metrics['kept_blocks_per_req']:>9.2f}"
+                f" {metrics['kept_bytes_per_req']:>8.1f}"
+            )
+        print(
+            f"{name:<28} {metrics['p50_us']:>8.2f}us {metrics['p99_us']:>8.2f}us {metrics['rps']:>10.0f}{memory}"
+        )
+
+    if args.save_baseline:
+        document = {"agencies": args.agencies, "ranges": args.ranges, "requests": args.requests, "results": results}
+        args.save_baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"\nbaseline written to {args.save_baseline}")
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare the linear ``find_spec`` scan with the precompiled ``FleetIndex``.
+
+Run from the repository root::
+
+    python benchmarks/bench_find_spec.py
+    python benchmarks/bench_find_spec.py --sizes 10 1000 100000 --lookups 2000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import synthetic_ranges  # noqa: E402
+from fleetdata import FleetIndex, FleetRange  # noqa: E402
+from main import find_spec  # noqa: E402
+
+
+def sample_ids(ranges: list[FleetRange], count: int, seed: int = 1) -> list[int]:
+    """Mix of hits (any covered ID) and misses (gaps and out-of-range IDs)."""
+    rng = random.Random(seed)
+    top = max(r.hi for r in ranges) + 50
+    return [rng.randint(0, top) for _ in range(count)]
+
+
+def time_per_lookup(ranges, ids: list[int]) -> float:
+    start = time.perf_counter()
+    for bus_id in ids:
+        find_spec(bus_id, ranges)
+    return (time.perf_counter() - start) / len(ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--lookups", type=int, default=2_000, help="lookups timed per size")
+    args = parser.parse_args()
+
+    print(f"{'ranges':>8}  {'build':>10}  {'scan':>12}  {'index':>12}  {'speedup':>8}")
+    for size in args.sizes:
+        ranges = synthetic_ranges(size)
+        ids = sample_ids(ranges, args.lookups)
+
+        start = time.perf_counter()
+        index = FleetIndex(ranges)
+        build = time.perf_counter() - start
+
+        for bus_id in ids:
+            assert find_spec(bus_id, index) is find_spec(bus_id, ranges)
+
+        scan = time_per_lookup(ranges, ids)
+        indexed = time_per_lookup(index, ids)
+        print(
+            f"{size:>8}  {build * 1e3:>8.2f}ms  {scan * 1e6:>10.2f}us  {indexed * 1e6:>10.2f}us  {scan / indexed:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
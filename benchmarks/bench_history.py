@@ -0,0 +1,72 @@
+"""Lookup cost as reused fleet numbers pile up history: list scan vs ``FleetIndex``.
+
+Each ID block is reused by ``--eras`` back-to-back service periods, and
+lookups ask for a random block on a random day. The scan walks the ranges in
+declaration order, as a plain list of dated ranges would; the index bisects
+the ID segments and then the segment's timeline.
+
+Run from the repository root::
+
+    python benchmarks/bench_history.py
+    python benchmarks/bench_history.py --eras 1 10 100 1000 --blocks 20 --lookups 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import synthetic_history  # noqa: E402
+from fleetdata import FleetIndex, FleetRange  # noqa: E402
+from main import find_spec  # noqa: E402
+
+
+def sample_lookups(ranges: list[FleetRange], count: int, seed: int = 1) -> list[tuple[int, date]]:
+    """Random IDs, covered or not, on random days from before the first delivery to past the last."""
+    rng = random.Random(seed)
+    top = max(r.hi for r in ranges) + 50
+    first = min(r.in_service for r in ranges).toordinal() - 365
+    last = max(r.in_service for r in ranges).toordinal() + 365
+    return [(rng.randint(0, top), date.fromordinal(rng.randint(first, last))) for _ in range(count)]
+
+
+def time_per_lookup(ranges, lookups: list[tuple[int, date]]) -> float:
+    start = time.perf_counter()
+    for bus_id, as_of in lookups:
+        find_spec(bus_id, ranges, as_of)
+    return (time.perf_counter() - start) / len(lookups)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--eras", type=int, nargs="+", default=[1, 10, 100, 1000], help="service periods per block")
+    parser.add_argument("--blocks", type=int, default=20, help="ID blocks")
+    parser.add_argument("--lookups", type=int, default=500, help="lookups timed per history depth")
+    args = parser.parse_args()
+
+    print(f"{'eras':>6}  {'ranges':>8}  {'build':>10}  {'scan':>12}  {'index':>12}  {'speedup':>8}")
+    for eras in args.eras:
+        ranges = synthetic_history(args.blocks, eras)
+        lookups = sample_lookups(ranges, args.lookups)
+
+        start = time.perf_counter()
+        index = FleetIndex(ranges)
+        build = time.perf_counter() - start
+
+        for bus_id, as_of in lookups:
+            assert find_spec(bus_id, index, as_of) is find_spec(bus_id, ranges, as_of)
+
+        scan = time_per_lookup(ranges, lookups)
+        indexed = time_per_lookup(index, lookups)
+        print(
+            f"{eras:>6}  {len(ranges):>8}  {build * 1e3:>8.2f}ms  {scan * 1e6:>10.2f}us  {indexed * 1e6:>10.2f}us"
+            f"  {scan / indexed:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
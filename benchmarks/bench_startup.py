@@ -0,0 +1,116 @@
+"""Time from process start to the first served request, with and without the snapshot cache.
+
+Each run is a fresh interpreter that imports ``main`` and sends one ``GET /``
+through the ASGI app, so interpreter startup, imports, the fleet snapshot and
+first-request setup are all counted. Scenarios:
+
+* ``no cache``: FLEET_SNAPSHOT_PATH is empty, everything is built.
+* ``cache miss``: the cache file is missing, so it is built and written.
+* ``cache hit``: the cache written by the previous run is loaded.
+
+Run from the repository root::
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --agencies 2000 --ranges 20 --repeat 3
+
+For a per-module import breakdown use ``python -X importtime -c "import main"``.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import synthetic_fleets, write_fleet_source  # noqa: E402
+
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def first_request():
+    sent = []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/", "raw_path": b"/", "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 1), "server": ("localhost", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await main.app(scope, receive, send)
+    return sent[0]["status"]
+
+status = asyncio.run(first_request())
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1e3,
+    "first_request_ms": (served - imported) * 1e3,
+    "status": status,
+    "jinja2": "jinja2" in sys.modules,
+}))
+"""
+
+
+def run_once(env: dict[str, str]) -> dict[str, float]:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["total_ms"] = (time.perf_counter() - started) * 1e3
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agencies", type=int, default=0, help="synthetic agencies (0 uses data/fleets.json)")
+    parser.add_argument("--ranges", type=int, default=40, help="ranges per synthetic agency")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per scenario; medians are reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, FLEET_SNAPSHOT_PATH=str(Path(scratch) / "snapshot.bin"))
+        if args.agencies:
+            source = write_fleet_source(
+                synthetic_fleets(args.agencies, args.ranges, args.seed), Path(scratch) / "fleets.json"
+            )
+            env["FLEET_DATA_SOURCE"] = str(source)
+            env["FLEET_DATA_PATH"] = str(Path(scratch) / "fleets.bin")
+        # Compile the fleet artifact up front so no scenario pays for it.
+        run_once(dict(env, FLEET_SNAPSHOT_PATH=""))
+
+        scenarios = {"no cache": [], "cache miss": [], "cache hit": []}
+        for _ in range(args.repeat):
+            scenarios["no cache"].append(run_once(dict(env, FLEET_SNAPSHOT_PATH="")))
+            Path(env["FLEET_SNAPSHOT_PATH"]).unlink(missing_ok=True)
+            scenarios["cache miss"].append(run_once(env))
+            scenarios["cache hit"].append(run_once(env))
+        cache_size = Path(env["FLEET_SNAPSHOT_PATH"]).stat().st_size
+
+    print(f"{'scenario':<12} {'import main':>12} {'1st request':>12} {'total':>10}  jinja2")
+    for name, runs in scenarios.items():
+        median = {key: statistics.median(run[key] for run in runs) for key in ("import_ms", "first_request_ms", "total_ms")}
+        print(
+            f"{name:<12} {median['import_ms']:>10.0f}ms {median['first_request_ms']:>10.1f}ms "
+            f"{median['total_ms']:>8.0f}ms  {'loaded' if any(run['jinja2'] for run in runs) else 'not loaded'}"
+        )
+    print(f"\ncache file: {cache_size / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
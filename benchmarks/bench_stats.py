@@ -0,0 +1,69 @@
+"""Time ``FleetStats`` column builds and uncached group-bys, with and without NumPy.
+
+Run from the repository root::
+
+    python benchmarks/bench_stats.py
+    python benchmarks/bench_stats.py --agencies 1000 --ranges 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fleetstats  # noqa: E402
+from benchmarks.synthetic import synthetic_fleets  # noqa: E402
+from fleetdata import PropulsionType  # noqa: E402
+
+QUERIES = (
+    ("by agency", {"by": ("agency",)}),
+    ("by agency, propulsion", {"by": ("agency", "propulsion_type")}),
+    ("by year, 2010+", {"by": ("year",), "year_from": 2010}),
+    ("by make, battery only", {"by": ("make",), "propulsion_types": (PropulsionType.BATTERY_ELECTRIC,)}),
+    ("all five dimensions", {"by": fleetstats.DIMENSIONS}),
+)
+
+
+def time_queries(stats: fleetstats.FleetStats, repeat: int) -> dict[str, float]:
+    timings = {}
+    for name, query in QUERIES:
+        query = dict(query)
+        by = query.pop("by")
+        best = float("inf")
+        for _ in range(repeat):
+            stats._results.clear()
+            started = time.perf_counter()
+            stats.group_counts(by, **query)
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agencies", type=int, default=500)
+    parser.add_argument("--ranges", type=int, default=40, help="ranges per agency")
+    parser.add_argument("--repeat", type=int, default=5, help="best-of runs per query")
+    args = parser.parse_args()
+
+    fleets = synthetic_fleets(args.agencies, args.ranges)
+    started = time.perf_counter()
+    stats = fleetstats.FleetStats(fleets)
+    print(f"{len(stats)} segments, columns built in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+    results = {}
+    numpy = fleetstats._load_numpy()
+    if numpy:
+        results["numpy"] = time_queries(stats, args.repeat)
+    fleetstats._numpy = False
+    results["python"] = time_queries(stats, args.repeat)
+
+    print(f"\n{'query':<26}" + "".join(f"{name:>12}" for name in results))
+    for name, _ in QUERIES:
+        print(f"{name:<26}" + "".join(f"{timings[name] * 1e3:>10.2f}ms" for timings in results.values()))
+
+
+if __name__ == "__main__":
+    main()
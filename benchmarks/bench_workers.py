@@ -0,0 +1,189 @@
+"""Per-worker memory and throughput of the prefork server.
+
+Starts ``serve.py`` for each ``--workers`` count and drives ``/api/fleet`` from
+``--clients`` processes over keep-alive connections. It reports each worker's
+memory (RSS, PSS and private bytes) when idle and under load, and the requests
+each worker served. Each client takes its session and CSRF token from one
+connection and makes its lookups on another. That connection may land on a
+different worker, so a 401 means workers disagree on secrets. Run from the
+repository root::
+
+    python benchmarks/bench_workers.py
+    python benchmarks/bench_workers.py --workers 1,2,4 --clients 8 --duration 10
+    python benchmarks/bench_workers.py --agencies 2000 --ranges 20
+
+Memory figures come from /proc and are Linux-only.
+"""
+
+import argparse
+import http.client
+import itertools
+import multiprocessing
+import os
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import synthetic_fleets, write_fleet_source  # noqa: E402
+from serve import memory_usage  # noqa: E402
+
+WORKER_REPORT = re.compile(r"Worker (\d+) served (\d+) requests")
+RECONNECT_EVERY = 50
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/")
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"server on port {port} did not come up")
+
+
+def worker_pids(supervisor: int) -> list[int]:
+    with open(f"/proc/{supervisor}/task/{supervisor}/children", encoding="ascii") as fh:
+        return sorted(int(pid) for pid in fh.read().split())
+
+
+def lookup_paths(agencies: int, ranges: int, count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    if agencies:
+        fleets = synthetic_fleets(agencies, ranges, seed)
+    else:
+        from fleetdata import parse_fleet_source
+
+        fleets = parse_fleet_source((ROOT / "data" / "fleets.json").read_bytes())
+    paths = []
+    for _ in range(count):
+        fleet = rng.choice(fleets)
+        r = rng.choice(fleet.ranges)
+        paths.append(f"/api/fleet?{urlencode({'agency': fleet.key, 'busId': r.lo})}")
+    return paths
+
+
+def client(port: int, paths: list[str], deadline: float) -> tuple[int, int]:
+    """Fetch a token on one connection, then loop lookups on another; return (ok, failed)."""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", "/")
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    cookies = "; ".join(
+        header.split(";", 1)[0] for name, header in response.getheaders() if name.lower() == "set-cookie"
+    )
+    token = next(
+        (c.split("=", 1)[1] for c in cookies.split("; ") if c.startswith("csrftoken=")),
+        "",
+    )
+    headers = {"Cookie": cookies, "X-CSRF-Token": token, "Origin": f"http://127.0.0.1:{port}"}
+
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    ok = failed = 0
+    for number, path in enumerate(itertools.cycle(paths), 1):
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status == 200:
+            ok += 1
+        else:
+            failed += 1
+        if number % RECONNECT_EVERY == 0:
+            # Reconnect now and then so every client spreads over the workers.
+            if time.time() >= deadline:
+                break
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port)
+    return ok, failed
+
+
+def run(workers: int, args: argparse.Namespace, env: dict[str, str], paths: list[str]) -> None:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--port", str(port), "--stats-interval", "0"],
+        cwd=ROOT,
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        wait_ready(port)
+        time.sleep(0.5)
+        pids = worker_pids(server.pid)
+        idle = {pid: memory_usage(pid) for pid in pids}
+
+        deadline = time.time() + args.duration
+        with multiprocessing.Pool(args.clients) as pool:
+            pending = pool.starmap_async(client, [(port, paths[i :: args.clients], deadline) for i in range(args.clients)])
+            time.sleep(args.duration * 0.8)
+            loaded = {pid: memory_usage(pid) for pid in pids}
+            supervisor = memory_usage(server.pid)
+            totals = pending.get()
+        ok = sum(ok for ok, _ in totals)
+        failed = sum(failed for _, failed in totals)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        _, log = server.communicate(timeout=60)
+
+    served = {int(pid): int(count) for pid, count in WORKER_REPORT.findall(log)}
+    print(f"\n{workers} worker(s): {ok / args.duration:.0f} req/s total, {failed} failed")
+    print(f"{'pid':>8} {'requests':>9} {'req/s':>8}   {'idle rss/pss/private MiB':>26}   {'loaded rss/pss/private MiB':>28}")
+    for pid in pids:
+        before, during = idle[pid], loaded[pid]
+        print(
+            f"{pid:>8} {served.get(pid, 0):>9} {served.get(pid, 0) / args.duration:>8.0f}   "
+            f"{_mib(before):>26}   {_mib(during):>28}"
+        )
+    print(f"{'parent':>8} {'':>9} {'':>8}   {_mib(supervisor):>26}")
+
+
+def _mib(usage: dict[str, int]) -> str:
+    return " / ".join(f"{usage.get(name, 0) / 2**20:.1f}" for name in ("rss", "pss", "private"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--clients", type=int, default=4, help="load-generating processes")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per run")
+    parser.add_argument("--agencies", type=int, default=0, help="synthetic agencies (0 uses data/fleets.json)")
+    parser.add_argument("--ranges", type=int, default=40, help="ranges per synthetic agency")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # SESSION_SECRET is deliberately left as found: when unset, workers share the supervisor's generated one.
+        env = dict(os.environ)
+        if args.agencies:
+            source = write_fleet_source(
+                synthetic_fleets(args.agencies, args.ranges, args.seed), Path(scratch) / "fleets.json"
+            )
+            env["FLEET_DATA_SOURCE"] = str(source)
+            env["FLEET_DATA_PATH"] = str(Path(scratch) / "fleets.bin")
+            env["FLEET_SNAPSHOT_PATH"] = str(Path(scratch) / "snapshot.bin")
+        paths = lookup_paths(args.agencies, args.ranges, 2000, args.seed)
+        for workers in (int(n) for n in args.workers.split(",")):
+            run(workers, args, env, paths)
+
+
+if __name__ == "__main__":
+    main()
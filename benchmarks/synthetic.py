@@ -0,0 +1,111 @@
+"""Synthetic fleet generators shared by the benchmarks.
+
+The generated data looks like the real tables: ranges declared out of order,
+small gaps between deliveries, and several agencies reusing the same
+fleet-number blocks so cross-agency suggestions get exercised.
+"""
+
+import json
+import random
+from datetime import date
+from pathlib import Path
+
+from fleetdata import AgencyFleet, FleetRange, FleetSpec, PropulsionType
+
+_MAKES = (
+    ("New Flyer", "Xcelsior®", ("XD40", "XDE40", "XN40", "XE40", "XD60")),
+    ("Nova Bus", "LFS", ("Diesel (4th Generation)", "Artic (2nd Generation)", "LFSe+")),
+    ("GILLIG", "Low Floor", ("", "Plus EV", "BRT Plus")),
+    ("Prevost", "X-Series", ("X3-45 Commuter (2nd Generation)",)),
+)
+_PROPULSION = tuple(PropulsionType)
+
+
+def _spec(rng: random.Random) -> FleetSpec:
+    make, series, models = rng.choice(_MAKES)
+    return FleetSpec(
+        rng.choice((None, *range(2004, 2027))),
+        make,
+        rng.choice(models),
+        rng.choice(_PROPULSION),
+        series,
+        rng.choice((29, 35, 40, 45, 60)),
+    )
+
+
+def synthetic_ranges(count: int, seed: int = 0, start: int = 100) -> list[FleetRange]:
+    """Build ``count`` non-overlapping ranges with small gaps, shuffled like hand-written data."""
+    rng = random.Random(seed)
+    ranges: list[FleetRange] = []
+    lo = start
+    for _ in range(count):
+        hi = lo + rng.randint(0, 60)
+        ranges.append(FleetRange(lo, hi, _spec(rng)))
+        lo = hi + 1 + rng.randint(0, 20)
+    rng.shuffle(ranges)
+    return ranges
+
+
+def synthetic_history(blocks: int, eras: int, seed: int = 0, start: int = 1000) -> list[FleetRange]:
+    """Build ``blocks`` ID blocks, each reused by ``eras`` back-to-back service periods, oldest declared first."""
+    rng = random.Random(seed)
+    ranges: list[FleetRange] = []
+    lo = start
+    for _ in range(blocks):
+        hi = lo + rng.randint(0, 40)
+        day = date(1990, 1, 1).toordinal() + rng.randint(0, 365)
+        for era in range(eras):
+            # The newest period is still in service.
+            retired = day + rng.randint(30, 1000) if era < eras - 1 else None
+            ranges.append(
+                FleetRange(lo, hi, _spec(rng), date.fromordinal(day), retired and date.fromordinal(retired))
+            )
+            day = retired
+        lo = hi + 1 + rng.randint(0, 20)
+    return ranges
+
+
+def synthetic_fleets(agencies: int, ranges_per_agency: int, seed: int = 0) -> list[AgencyFleet]:
+    """Build ``agencies`` fleets whose ID spaces partly overlap, like 1000/3000/5300 in the real data."""
+    rng = random.Random(seed)
+    fleets: list[AgencyFleet] = []
+    span = 40 * ranges_per_agency
+    for number in range(agencies):
+        # Most agencies get their own stretch of IDs; a few reuse the popular blocks.
+        if rng.random() < 0.1:
+            start = rng.choice((100, 1000, 3000, 5000, 7000)) + rng.randint(0, 400)
+        else:
+            start = rng.randint(0, agencies * span // 3)
+        ranges = synthetic_ranges(ranges_per_agency, seed=rng.randrange(2**32), start=start)
+        fleets.append(AgencyFleet(f"AGENCY_{number:05d}", f"Synthetic Transit {number}", ranges))
+    return fleets
+
+
+def write_fleet_source(fleets: list[AgencyFleet], path: Path) -> Path:
+    """Write ``fleets`` in the ``data/fleets.json`` source format."""
+    document = {
+        "agencies": [
+            {
+                "key": fleet.key,
+                "display_name": fleet.display_name,
+                "ranges": [
+                    {
+                        "lo": r.lo,
+                        "hi": r.hi,
+                        "year": r.spec.year,
+                        "make": r.spec.make,
+                        "model": r.spec.model,
+                        "propulsion_type": r.spec.propulsion_type.value,
+                        "series": r.spec.series,
+                        "length_ft": r.spec.length_ft,
+                        "in_service": r.in_service and r.in_service.isoformat(),
+                        "retired": r.retired and r.retired.isoformat(),
+                    }
+                    for r in fleet.ranges
+                ],
+            }
+            for fleet in fleets
+        ]
+    }
+    path.write_text(json.dumps(document, ensure_ascii=False))
+    return path
@@ -0,0 +1,315 @@
+"""Consistency checks over fleet ranges.
+
+``validate_fleets`` sweeps each agency's ranges in ``lo`` order once, so a
+full check is O(n log² n) plus O(log n) per overlapping pair it reports,
+however often IDs are reused in other service periods.
+It finds:
+
+* ``invalid_bound`` and ``inverted_range`` (error): ranges whose bounds are
+  not fleet numbers of one series, or run backwards, which the lookup index
+  cannot use.
+* ``inverted_dates`` (error): ranges retired on or before the day they enter
+  service, which no lookup can return.
+* ``conflicting_overlap`` (error): two ranges of one agency claim the same
+  IDs on the same days with different specs, so lookups quietly return the
+  first declared. Reusing IDs in service periods that do not meet is fine.
+* ``redundant_overlap`` (warning): the same, with equal specs.
+* ``coalescible`` (info): adjacent ranges with equal specs and service dates
+  that could be one range.
+* ``gap`` (info): IDs no range of an agency has ever held, between its ranges
+  in one series.
+* ``shared_ids`` (info): IDs claimed by more than one agency, per pair, in
+  any service period.
+
+Check a source file by hand with::
+
+    python fleetcheck.py data/fleets.json
+"""
+
+import heapq
+import json
+import sys
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from fleetdata import AgencyFleet, BusID, FleetRange, fleet_number_key, format_bus_id, same_series
+
+ERROR = "error"
+WARNING = "warning"
+INFO = "info"
+
+SEVERITIES = {
+    "invalid_bound": ERROR,
+    "inverted_range": ERROR,
+    "inverted_dates": ERROR,
+    "conflicting_overlap": ERROR,
+    "redundant_overlap": WARNING,
+    "coalescible": INFO,
+    "gap": INFO,
+    "shared_ids": INFO,
+}
+
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    kind: str
+    agency: str
+    message: str
+    ranges: tuple[int, ...] = ()
+    lo: BusID | None = None
+    hi: BusID | None = None
+
+    @property
+    def severity(self) -> str:
+        return SEVERITIES[self.kind]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"severity": self.severity, **asdict(self), "ranges": list(self.ranges)}
+
+
+@dataclass(frozen=True)
+class ValidationReport:
+    issues: tuple[ValidationIssue, ...] = ()
+    agencies: int = 0
+    ranges: int = 0
+    counts: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def errors(self) -> tuple[ValidationIssue, ...]:
+        return tuple(issue for issue in self.issues if issue.severity == ERROR)
+
+    def summary(self) -> str:
+        counted = ", ".join(f"{count} {kind}" for kind, count in sorted(self.counts.items())) or "no issues"
+        return f"{self.agencies} agencies, {self.ranges} ranges: {counted}."
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ok": not self.errors,
+            "agencies": self.agencies,
+            "ranges": self.ranges,
+            "counts": dict(sorted(self.counts.items())),
+            "issues": [issue.to_dict() for issue in self.issues],
+        }
+
+
+class _ServicePeriods:
+    """Ranges keyed by number, indexed by service period in a segment tree over the given days.
+
+    A range is stored in the O(log n) nodes whose spans make up its period,
+    and each node counts the ranges stored below it. ``overlapping`` only
+    descends into non-empty nodes that meet the query. It costs O(log n) plus
+    O(log n) per range returned, however many time-disjoint ranges are stored.
+    """
+
+    def __init__(self, days: Iterable[int]) -> None:
+        self._days = sorted(set(days))
+        size = 1
+        while size < len(self._days) - 1:
+            size *= 2
+        self._size = size
+        self._buckets: list[dict[int, Any]] = [{} for _ in range(2 * size)]
+        self._load = [0] * (2 * size)
+
+    def _nodes(self, first: int, last: int) -> list[int]:
+        lo = bisect_left(self._days, first) + self._size
+        hi = bisect_left(self._days, last) + self._size
+        nodes = []
+        while lo < hi:
+            if lo & 1:
+                nodes.append(lo)
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                nodes.append(hi)
+            lo >>= 1
+            hi >>= 1
+        return nodes
+
+    def add(self, number: int, item: Any, first: int, last: int) -> list[int]:
+        """Store ``item``; returns the nodes holding it, for ``remove``."""
+        nodes = self._nodes(first, last)
+        for node in nodes:
+            self._buckets[node][number] = item
+            while node:
+                self._load[node] += 1
+                node >>= 1
+        return nodes
+
+    def remove(self, number: int, nodes: list[int]) -> None:
+        for node in nodes:
+            del self._buckets[node][number]
+            while node:
+                self._load[node] -= 1
+                node >>= 1
+
+    def overlapping(self, first: int, last: int) -> dict[int, Any]:
+        """The stored ranges whose periods share a day with ``first <= day < last``."""
+        found: dict[int, Any] = {}
+        if not self._load[1]:
+            return found
+        lo, hi = bisect_left(self._days, first), bisect_left(self._days, last)
+        pending = [(1, 0, self._size)]
+        while pending:
+            node, start, end = pending.pop()
+            if not self._load[node] or end <= lo or hi <= start:
+                continue
+            found.update(self._buckets[node])
+            if node < self._size:
+                middle = (start + end) // 2
+                pending.append((2 * node, start, middle))
+                pending.append((2 * node + 1, middle, end))
+        return found
+
+
+def _check_agency(fleet: AgencyFleet) -> list[ValidationIssue]:
+    issues: list[ValidationIssue] = []
+    entries: list[tuple[int, int, int, FleetRange]] = []
+    for number, r in enumerate(fleet.ranges):
+        try:
+            lo, hi = fleet_number_key(r.lo), fleet_number_key(r.hi)
+        except ValueError:
+            lo = hi = None
+        if lo is None or not same_series(lo, hi):
+            issues.append(
+                ValidationIssue("invalid_bound", fleet.key, f"Range #{number} has bounds {r.lo!r}..{r.hi!r}.", (number,))
+            )
+            continue
+        if lo > hi:
+            issues.append(
+                ValidationIssue(
+                    "inverted_range", fleet.key, f"Range #{number} starts after it ends.", (number,), r.lo, r.hi
+                )
+            )
+            continue
+        first, last = r.service_days
+        if first >= last:
+            issues.append(
+                ValidationIssue(
+                    "inverted_dates",
+                    fleet.key,
+                    f"Range #{number} is retired ({r.retired}) no later than it enters service ({r.in_service}).",
+                    (number,),
+                    r.lo,
+                    r.hi,
+                )
+            )
+            continue
+        entries.append((lo, hi, number, r))
+    entries.sort()
+
+    # ``active`` holds ranges still open at the current ``lo``, keyed by ``hi``,
+    # and ``periods`` the same ranges by service period, so ranges reusing the
+    # IDs in other periods are never visited. ``reach`` is the open range
+    # extending furthest, for gap and adjacency checks.
+    active: list[tuple[int, int, FleetRange, list[int]]] = []
+    periods = _ServicePeriods(day for *_, r in entries for day in r.service_days)
+    reach: tuple[int, int, FleetRange] | None = None
+    for lo, hi, number, r in entries:
+        while active and active[0][0] < lo:
+            _, other_number, _, nodes = heapq.heappop(active)
+            periods.remove(other_number, nodes)
+        for other_number, (other_hi, other) in sorted(periods.overlapping(*r.service_days).items()):
+            first, second = sorted((other_number, number))
+            same = other.spec == r.spec
+            start, end = format_bus_id(lo), format_bus_id(min(hi, other_hi))
+            issues.append(
+                ValidationIssue(
+                    "redundant_overlap" if same else "conflicting_overlap",
+                    fleet.key,
+                    f"Ranges #{first} and #{second} both cover {start}..{end}"
+                    + ("." if same else f"; lookups return range #{first}."),
+                    (first, second),
+                    start,
+                    end,
+                )
+            )
+        if reach is not None:
+            reach_hi, reach_number, reach_range = reach
+            if same_series(reach_hi, lo) and lo > reach_hi + 1:
+                start, end = format_bus_id(reach_hi + 1), format_bus_id(lo - 1)
+                issues.append(
+                    ValidationIssue("gap", fleet.key, f"IDs {start}..{end} are unassigned.", (), start, end)
+                )
+            elif (
+                same_series(reach_hi, lo)
+                and lo == reach_hi + 1
+                and reach_range.spec == r.spec
+                and reach_range.service_days == r.service_days
+            ):
+                issues.append(
+                    ValidationIssue(
+                        "coalescible",
+                        fleet.key,
+                        f"Ranges #{reach_number} and #{number} are adjacent with the same spec.",
+                        (reach_number, number),
+                        reach_range.lo,
+                        r.hi,
+                    )
+                )
+        heapq.heappush(active, (hi, number, r, periods.add(number, (hi, r), *r.service_days)))
+        if reach is None or hi > reach[0]:
+            reach = (hi, number, r)
+    return issues
+
+
+def _shared_ids(fleets: list[AgencyFleet]) -> list[ValidationIssue]:
+    """Sweep every agency's disjoint lookup segments together and total the IDs each agency pair shares."""
+    events = sorted(
+        (lo, hi, order) for order, fleet in enumerate(fleets) for lo, hi, _ in fleet.index.timelines()
+    )
+    shared: dict[tuple[int, int], list[int]] = {}
+    active: list[tuple[int, int]] = []
+    for lo, hi, order in events:
+        while active and active[0][0] < lo:
+            heapq.heappop(active)
+        for other_hi, other_order in active:
+            pair = (min(order, other_order), max(order, other_order))
+            overlap_hi = min(hi, other_hi)
+            totals = shared.setdefault(pair, [0, lo, overlap_hi])
+            totals[0] += overlap_hi - lo + 1
+            totals[1] = min(totals[1], lo)
+            totals[2] = max(totals[2], overlap_hi)
+        heapq.heappush(active, (hi, order))
+
+    issues = []
+    for (first, second), (count, lo, hi) in sorted(shared.items()):
+        a, b = fleets[first].key, fleets[second].key
+        lo, hi = format_bus_id(lo), format_bus_id(hi)
+        issues.append(
+            ValidationIssue("shared_ids", a, f"{count} IDs between {lo} and {hi} are also claimed by {b}.", (), lo, hi)
+        )
+    return issues
+
+
+def validate_fleets(fleets: Iterable[AgencyFleet]) -> ValidationReport:
+    fleets = list(fleets)
+    issues: list[ValidationIssue] = []
+    for fleet in fleets:
+        issues.extend(_check_agency(fleet))
+    issues.extend(_shared_ids(fleets))
+    counts: dict[str, int] = {}
+    for issue in issues:
+        counts[issue.kind] = counts.get(issue.kind, 0) + 1
+    return ValidationReport(tuple(issues), len(fleets), sum(len(fleet.ranges) for fleet in fleets), counts)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from fleetdata import parse_fleet_source
+
+    parser = argparse.ArgumentParser(description="Check fleet source data and print a JSON report.")
+    parser.add_argument("source", nargs="?", default="data/fleets.json")
+    parser.add_argument("--errors-only", action="store_true", help="only list error-severity issues")
+    args = parser.parse_args()
+    with open(args.source, "rb") as fh:
+        report = validate_fleets(parse_fleet_source(fh.read()))
+    document = report.to_dict()
+    if args.errors_only:
+        document["issues"] = [issue for issue in document["issues"] if issue["severity"] == ERROR]
+    json.dump(document, sys.stdout, indent=2)
+    print()
+    print(report.summary(), file=sys.stderr)
+    sys.exit(1 if report.errors else 0)
@@ -0,0 +1,1253 @@
+"""Fleet data model, lookup indexes and the compiled binary fleet format.
+
+``data/fleets.json`` is the editable source of every agency's ranges.
+``compile_fleet_data`` turns it into a compact little-endian artifact holding
+an interned string table, deduplicated specs with enum codes for
+``PropulsionType``, and each agency's ranges and pre-flattened lookup segments
+as flat integer arrays. ``FleetStore`` maps that artifact read-only, so every
+worker on a host shares one page-cache copy, and decodes agencies, ranges and
+specs only when they are first touched.
+
+Fleet numbers get reused, so a range may carry ``in_service`` and ``retired``
+dates. It holds its numbers from ``in_service`` up to the day before
+``retired``; a missing date leaves that side open. Internally days are date
+ordinals (``date.toordinal()``). Indexes are two-dimensional: ID segments,
+each with a timeline of the ranges in service from given days on.
+
+Structures built over a store (indexes, rendered responses) can be saved with
+``dump_store_objects`` and read back with ``load_store_objects``. Agencies and
+ranges are written as references into the store, not copied.
+
+Compile by hand with::
+
+    python fleetdata.py data/fleets.json data/fleets.bin
+"""
+
+import hashlib
+import heapq
+import io
+import json
+import logging
+import mmap
+import os
+import pickle
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import date
+from enum import Enum
+from pathlib import Path
+from typing import Any, Union
+
+logger = logging.getLogger(__name__)
+
+BusID = Union[int, str]
+
+# Fleet numbers key as int64 so every index stays a flat array searched with
+# bisect. Plain numbers key as themselves. A prefix and/or suffix of up to three
+# letters selects a series above them: key = series << NUMBER_BITS | number,
+# with the prefix and suffix packed in base 27 so keys sort by (prefix, suffix,
+# number). A range stays inside one series: "5271A".."5275A" is 5271A, 5272A,
+# ... 5275A, never 5272 or 5272B.
+NUMBER_BITS = 32
+NUMBER_LIMIT = 1 << NUMBER_BITS
+NO_MATCH_KEY = -1
+_SERIES_LETTERS = 3
+_LETTER_SPACE = 27**_SERIES_LETTERS
+_FLEET_NUMBER = re.compile(r"(?:([A-Z]{1,3})[- ]?)?([0-9]+)(?:[- ]?([A-Z]{1,3}))?")
+
+# A range is in service on days ``first <= day < last``; an open start is day 0
+# and an open end is END_OF_TIME, so undated ranges cover every day.
+END_OF_TIME = date.max.toordinal() + 1
+
+
+def today() -> int:
+    return date.today().toordinal()
+
+
+class FleetDataError(ValueError):
+    """Raised when fleet source data or a compiled artifact is invalid."""
+
+
+class PropulsionType(Enum):
+    CNG = "CNG"
+    BATTERY_ELECTRIC = "Battery Electric"
+    TROLLEY = "Trolley"
+    HYBRID_ELECTRIC = "Hybrid Electric"
+    DIESEL_ELECTRIC = "Diesel Electric"
+    DIESEL = "Diesel"
+    HYDROGEN_FUEL_CELL = "Hydrogen Fuel Cell"
+
+def _pack_letters(letters: str) -> int:
+    code = 0
+    for position in range(_SERIES_LETTERS):
+        code = code * 27 + (ord(letters[position]) - 64 if position < len(letters) else 0)
+    return code
+
+
+def _unpack_letters(code: int) -> str:
+    letters = []
+    for _ in range(_SERIES_LETTERS):
+        code, digit = divmod(code, 27)
+        letters.append(chr(64 + digit) if digit else "")
+    return "".join(reversed(letters))
+
+
+@dataclass(frozen=True, order=True)
+class FleetNumber:
+    """A fleet number split into letter prefix, number and letter suffix, e.g. ``5271A``.
+
+    Parsing is case-insensitive and allows one ``-`` or space between parts.
+    """
+
+    prefix: str
+    suffix: str
+    number: int
+
+    @classmethod
+    def parse(cls, value: BusID) -> "FleetNumber":
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f"Not a fleet number: {value!r}.")
+        if isinstance(value, int):
+            prefix, number, suffix = "", value, ""
+        else:
+            match = _FLEET_NUMBER.fullmatch(value.strip().upper())
+            if match is None:
+                raise ValueError(f"Not a fleet number: {value!r}.")
+            prefix, digits, suffix = match.groups(default="")
+            number = int(digits)
+        if not 0 <= number < NUMBER_LIMIT:
+            raise ValueError(f"Fleet number out of range: {value!r}.")
+        return cls(prefix, suffix, number)
+
+    @classmethod
+    def from_key(cls, key: int) -> "FleetNumber":
+        series, number = divmod(key, NUMBER_LIMIT)
+        prefix, suffix = divmod(series, _LETTER_SPACE)
+        return cls(_unpack_letters(prefix), _unpack_letters(suffix), number)
+
+    @property
+    def series(self) -> int:
+        return _pack_letters(self.prefix) * _LETTER_SPACE + _pack_letters(self.suffix)
+
+    @property
+    def key(self) -> int:
+        return self.series << NUMBER_BITS | self.number
+
+    def __str__(self) -> str:
+        return f"{self.prefix}{self.number}{self.suffix}"
+
+
+def fleet_number_key(value: BusID) -> int:
+    """Key for a range bound; raises ``ValueError`` unless ``value`` is a valid fleet number."""
+    if type(value) is int and 0 <= value < NUMBER_LIMIT:
+        return value
+    return FleetNumber.parse(value).key
+
+
+def bus_id_key(value: BusID) -> int:
+    """Key for a looked-up ID, with the plain-number fast path.
+
+    Anything ``int()`` accepts keys as that number, or as ``NO_MATCH_KEY`` when
+    no range could hold it; other values go through ``FleetNumber.parse``,
+    which raises ``ValueError``.
+    """
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return FleetNumber.parse(value).key
+    return number if 0 <= number < NUMBER_LIMIT else NO_MATCH_KEY
+
+
+def format_bus_id(key: int) -> BusID:
+    """Inverse of the key functions: an ``int`` for plain numbers, else the canonical string."""
+    return key if 0 <= key < NUMBER_LIMIT else str(FleetNumber.from_key(key))
+
+
+def same_series(lo: int, hi: int) -> bool:
+    return lo >> NUMBER_BITS == hi >> NUMBER_BITS
+
+
+@dataclass(frozen=True)
+class FleetSpec:
+    year: int | None
+    make: str
+    model: str
+    propulsion_type: PropulsionType
+    series: str = ""
+    length_ft: int | None = None
+    display_name: str | None = None
+
+@dataclass(frozen=True)
+class FleetRange:
+    lo: BusID
+    hi: BusID
+    spec: FleetSpec
+    in_service: date | None = None
+    retired: date | None = None
+
+    @property
+    def service_days(self) -> tuple[int, int]:
+        """``(first, last)`` day ordinals: the range is in service on ``first <= day < last``."""
+        return (
+            0 if self.in_service is None else self.in_service.toordinal(),
+            END_OF_TIME if self.retired is None else self.retired.toordinal(),
+        )
+
+
+# ``((since_day, range), ...)`` in day order, starting at day 0: the range a
+# lookup returns from each day on, or ``None`` while none is in service.
+Timeline = tuple[tuple[int, Union[FleetRange, None]], ...]
+
+
+class FleetIndex:
+    """Immutable two-dimensional (ID x day) interval index over one agency's ranges.
+
+    Ranges are flattened once into sorted, disjoint ID segments, each with a
+    ``Timeline``. A lookup is a binary search over the ``lo`` bounds and, when
+    the segment's numbers were reused, one over its timeline, so it stays
+    logarithmic however much history piles up. Where ranges overlap on a day,
+    the range declared first wins, matching what a top-to-bottom scan would
+    return.
+    """
+
+    __slots__ = ("_los", "_his", "_cells", "_since", "_ranges")
+
+    def __init__(self, ranges: Iterable[FleetRange]) -> None:
+        los = array("q")
+        his = array("q")
+        cells = array("I", [0])
+        since = array("i")
+        winners: list[FleetRange | None] = []
+        previous: Timeline = ()
+        for lo, hi, timeline in _flatten_ranges(ranges):
+            if his and his[-1] + 1 == lo and _same_timeline(previous, timeline):
+                his[-1] = hi
+                continue
+            los.append(lo)
+            his.append(hi)
+            for day, r in timeline:
+                since.append(day)
+                winners.append(r)
+            cells.append(len(winners))
+            previous = timeline
+        self._los: Sequence[int] = los
+        self._his: Sequence[int] = his
+        self._cells: Sequence[int] = cells
+        self._since: Sequence[int] = since
+        self._ranges: Sequence[FleetRange | None] = tuple(winners)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        los: Sequence[int],
+        his: Sequence[int],
+        cells: Sequence[int],
+        since: Sequence[int],
+        ranges: Sequence[FleetRange | None],
+    ) -> "FleetIndex":
+        """Wrap segments that are already sorted and disjoint, e.g. arrays mapped from disk.
+
+        Segment ``i``'s timeline is ``since`` and ``ranges`` from ``cells[i]`` up to ``cells[i + 1]``.
+        """
+        index = cls.__new__(cls)
+        index._los = los
+        index._his = his
+        index._cells = cells
+        index._since = since
+        index._ranges = ranges
+        return index
+
+    def _at(self, i: int, day: int) -> FleetRange | None:
+        first, last = self._cells[i], self._cells[i + 1]
+        if last - first > 1:
+            first = bisect_right(self._since, day, first, last) - 1
+        return self._ranges[first]
+
+    def lookup(self, bus_id: int, day: int | None = None) -> FleetRange | None:
+        """Return the range holding ``bus_id`` on ``day``, a date ordinal defaulting to today."""
+        i = bisect_right(self._los, bus_id) - 1
+        if i >= 0 and bus_id <= self._his[i]:
+            return self._at(i, today() if day is None else day)
+        return None
+
+    def segments(self, day: int | None = None) -> Iterator[tuple[int, int, FleetRange]]:
+        """Yield ``(lo, hi, range)`` for the ranges in service on ``day`` (today by default), in ID order."""
+        if day is None:
+            day = today()
+        for i, (lo, hi) in enumerate(zip(self._los, self._his)):
+            r = self._at(i, day)
+            if r is not None:
+                yield lo, hi, r
+
+    def timelines(self) -> Iterator[tuple[int, int, Timeline]]:
+        """Yield ``(lo, hi, timeline)`` for every segment, in ID order."""
+        cells = self._cells
+        for i, (lo, hi) in enumerate(zip(self._los, self._his)):
+            first, last = cells[i], cells[i + 1]
+            yield lo, hi, tuple(zip(self._since[first:last], self._ranges[first:last]))
+
+    def history(self) -> Iterator[tuple[int, int, FleetRange]]:
+        """Yield ``(lo, hi, range)`` for every range a lookup in ``[lo, hi]`` returns on some day."""
+        for lo, hi, timeline in self.timelines():
+            seen: set[int] = set()
+            for _, r in timeline:
+                if r is not None and id(r) not in seen:
+                    seen.add(id(r))
+                    yield lo, hi, r
+
+    def __len__(self) -> int:
+        return len(self._los)
+
+
+def _same_timeline(a: Timeline, b: Timeline) -> bool:
+    return len(a) == len(b) and all(x[0] == y[0] and x[1] is y[1] for x, y in zip(a, b))
+
+
+def _flatten_ranges(ranges: Iterable[FleetRange]) -> Iterator[tuple[int, int, Timeline]]:
+    """Yield sorted, disjoint ``(lo, hi, timeline)`` pieces, first declared range winning overlaps."""
+    entries = []
+    for order, r in enumerate(ranges):
+        lo, hi = fleet_number_key(r.lo), fleet_number_key(r.hi)
+        first, last = r.service_days
+        if lo <= hi and first < last:
+            entries.append((lo, hi, order, first, last, r))
+    entries.sort()
+    points = sorted({entry[0] for entry in entries} | {entry[1] + 1 for entry in entries})
+    active: dict[int, tuple[int, int, FleetRange]] = {}
+    expiring: list[tuple[int, int]] = []
+    pending = 0
+    for start, stop in zip(points, points[1:]):
+        while pending < len(entries) and entries[pending][0] <= start:
+            _, hi, order, first, last, r = entries[pending]
+            active[order] = (first, last, r)
+            heapq.heappush(expiring, (hi, order))
+            pending += 1
+        while expiring and expiring[0][0] < start:
+            del active[heapq.heappop(expiring)[1]]
+        if active:
+            yield start, stop - 1, _timeline(active)
+
+
+def _timeline(active: Mapping[int, tuple[int, int, FleetRange]]) -> Timeline:
+    """Sweep the service periods of ``active`` (declaration order -> (first, last, range)) over time."""
+    if len(active) == 1:
+        ((first, last, r),) = active.values()
+        if first == 0 and last == END_OF_TIME:
+            return ((0, r),)
+    starts = sorted((first, order, last, r) for order, (first, last, r) in active.items())
+    days = sorted({0, *(first for first, _, _, _ in starts), *(last for _, _, last, _ in starts if last < END_OF_TIME)})
+    serving: list[tuple[int, int, FleetRange]] = []
+    timeline: list[tuple[int, FleetRange | None]] = []
+    pending = 0
+    for day in days:
+        while pending < len(starts) and starts[pending][0] <= day:
+            _, order, last, r = starts[pending]
+            heapq.heappush(serving, (order, last, r))
+            pending += 1
+        while serving and serving[0][1] <= day:
+            heapq.heappop(serving)
+        r = serving[0][2] if serving else None
+        if not timeline or timeline[-1][1] is not r:
+            timeline.append((day, r))
+    return tuple(timeline)
+
+
+@dataclass(frozen=True)
+class AgencyFleet:
+    """An agency's ranges in declaration order; ``index`` is built from them unless supplied."""
+
+    key: str
+    display_name: str
+    ranges: Sequence[FleetRange]
+    index: FleetIndex = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.index is None:
+            object.__setattr__(self, "index", FleetIndex(self.ranges))
+
+
+FleetMatch = tuple[AgencyFleet, FleetRange]
+
+
+class CoverageIndex:
+    """Cross-agency reverse index from a bus ID and day to every agency range covering it.
+
+    All agencies' segments are merged into one sorted boundary array. Each
+    elementary segment between two boundaries has a timeline, like
+    ``FleetIndex``, of interned match tuples in agency order. A lookup is a
+    bisect over the boundaries, plus one over the timeline where numbers were
+    reused, whatever the agency count or history length. Each distinct tuple
+    has a stable ordinal (``0`` is the empty tuple) that callers can key
+    caches on.
+    """
+
+    __slots__ = ("_starts", "_cells", "_since", "_ordinals", "_coverings")
+
+    def __init__(self, fleets: Iterable[AgencyFleet]) -> None:
+        events: dict[int, list[tuple[int, AgencyFleet, Timeline | None]]] = {}
+        for order, agency in enumerate(fleets):
+            for lo, hi, timeline in agency.index.timelines():
+                events.setdefault(lo, []).append((order, agency, timeline))
+                events.setdefault(hi + 1, []).append((order, agency, None))
+
+        starts = array("q")
+        cells = array("I", [0])
+        since = array("i")
+        ordinals = array("I")
+        coverings: list[tuple[FleetMatch, ...]] = [()]
+        interned: dict[tuple[tuple[int, int], ...], int] = {(): 0}
+
+        def intern(matches: list[tuple[int, AgencyFleet, FleetRange]]) -> int:
+            key = tuple((order, id(r)) for order, _, r in matches)
+            ordinal = interned.get(key)
+            if ordinal is None:
+                ordinal = interned[key] = len(coverings)
+                coverings.append(tuple((agency, r) for _, agency, r in matches))
+            return ordinal
+
+        active: dict[int, tuple[AgencyFleet, Timeline]] = {}
+        previous: tuple[tuple[int, int], ...] = ()
+        for point in sorted(events):
+            for order, agency, timeline in events[point]:
+                if timeline is None:
+                    active.pop(order, None)
+            for order, agency, timeline in events[point]:
+                if timeline is not None:
+                    active[order] = (agency, timeline)
+            cover = _merge_timelines([(order, *active[order]) for order in sorted(active)], intern)
+            if cover == previous:
+                continue
+            starts.append(point)
+            for day, ordinal in cover:
+                since.append(day)
+                ordinals.append(ordinal)
+            cells.append(len(ordinals))
+            previous = cover
+        self._starts = starts
+        self._cells = cells
+        self._since = since
+        self._ordinals = ordinals
+        self._coverings = tuple(coverings)
+
+    def _ordinal_at(self, i: int, day: int) -> int:
+        first, last = self._cells[i], self._cells[i + 1]
+        if last - first > 1:
+            first = bisect_right(self._since, day, first, last) - 1
+        return self._ordinals[first]
+
+    def locate(self, bus_id: int, day: int | None = None) -> int:
+        """Return the ordinal of the matches covering ``bus_id`` on ``day`` (today by default)."""
+        i = bisect_right(self._starts, bus_id) - 1
+        if i < 0:
+            return 0
+        # ``_ordinal_at`` inlined: this is the per-request path.
+        first, last = self._cells[i], self._cells[i + 1]
+        if last - first > 1:
+            first = bisect_right(self._since, today() if day is None else day, first, last) - 1
+        return self._ordinals[first]
+
+    def lookup(self, bus_id: int, day: int | None = None) -> tuple[FleetMatch, ...]:
+        return self._coverings[self.locate(bus_id, day)]
+
+    def lookup_sorted(self, bus_ids: Iterable[int], day: int | None = None) -> Iterator[tuple[FleetMatch, ...]]:
+        """Merge ascending ``bus_ids`` against the boundaries, yielding matches on ``day`` in order.
+
+        Each bisect starts from the previous position, so a sorted batch costs one
+        pass over the boundaries at most.
+        """
+        if day is None:
+            day = today()
+        starts = self._starts
+        position = 0
+        for bus_id in bus_ids:
+            position = bisect_right(starts, bus_id, position)
+            yield self._coverings[self._ordinal_at(position - 1, day)] if position else ()
+
+    def segments(self, day: int | None = None) -> Iterator[tuple[int, int, tuple[FleetMatch, ...]]]:
+        """Yield ``(lo, hi, matches)`` for every segment covered on ``day`` (today by default), in ID order."""
+        if day is None:
+            day = today()
+        starts = self._starts
+        for i in range(len(starts)):
+            ordinal = self._ordinal_at(i, day)
+            if ordinal:
+                yield starts[i], starts[i + 1] - 1, self._coverings[ordinal]
+
+    def coverings(self) -> tuple[tuple[FleetMatch, ...], ...]:
+        """Every distinct match tuple, indexed by ordinal."""
+        return self._coverings
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+
+def _merge_timelines(
+    active: list[tuple[int, AgencyFleet, Timeline]], intern: Callable[[list[tuple[int, AgencyFleet, FleetRange]]], int]
+) -> tuple[tuple[int, int], ...]:
+    """Combine agencies' timelines over one ID segment into ``((since_day, ordinal), ...)``."""
+    if all(len(timeline) == 1 for _, _, timeline in active):
+        return ((0, intern([(order, agency, timeline[0][1]) for order, agency, timeline in active])),)
+    days = sorted({day for _, _, timeline in active for day, _ in timeline})
+    positions = [0] * len(active)
+    cover: list[tuple[int, int]] = []
+    for day in days:
+        matches = []
+        for n, (order, agency, timeline) in enumerate(active):
+            position = positions[n]
+            while position + 1 < len(timeline) and timeline[position + 1][0] <= day:
+                position += 1
+            positions[n] = position
+            r = timeline[position][1]
+            if r is not None:
+                matches.append((order, agency, r))
+        ordinal = intern(matches)
+        if not cover or cover[-1][1] != ordinal:
+            cover.append((day, ordinal))
+    return tuple(cover)
+
+
+def _decimal_blocks(lo: int, hi: int) -> Iterator[tuple[str, int]]:
+    """Split ``[lo, hi]`` into aligned decimal blocks ``(prefix, k)``.
+
+    A block is every ID spelled ``prefix`` followed by exactly ``k`` more digits.
+    Blocks never straddle a power of ten, so the IDs in one block share a length.
+    """
+    lo = max(lo, 0)
+    while lo <= hi:
+        digits = len(str(lo))
+        end = min(hi, 10**digits - 1)
+        k = 0
+        while k + 1 < digits and lo % 10 ** (k + 1) == 0 and lo + 10 ** (k + 1) - 1 <= end:
+            k += 1
+        yield str(lo // 10**k), k
+        lo += 10**k
+
+
+# (id length, agency order, range lo, sequence, agency, range); the first four fields rank it.
+PrefixEntry = tuple[int, int, int, int, AgencyFleet, FleetRange]
+
+
+class PrefixIndex:
+    """Typeahead index from a decimal prefix to the ranges holding IDs that start with it.
+
+    Every segment is split into aligned decimal blocks at build time. A query
+    ``q`` matches blocks whose prefix extends ``q`` (looked up directly under
+    ``q``) and blocks whose prefix is a shorter part of ``q`` with enough free
+    digits left (at most ``len(q)`` lookups). Results rank shortest completion
+    first, then agency order, then range start, and each key keeps only its best
+    ``cap`` entries, so a keystroke costs a few dictionary hits. Only plain
+    numbers are indexed; lettered series are left out. Only ranges in service
+    on ``day`` (today by default) are included, and ``covers`` tells which
+    days the index stays correct for: all of them when nothing is dated.
+    """
+
+    __slots__ = ("_under", "_blocks", "_days")
+
+    def __init__(self, fleets: Iterable[AgencyFleet], cap: int = 20, day: int | None = None) -> None:
+        if day is None:
+            day = today()
+        under: dict[str, list[tuple[int, int, int, int, FleetMatch]]] = {}
+        blocks: dict[tuple[str, int], list[tuple[int, int, int, int, FleetMatch]]] = {}
+        sequence = 0
+
+        def keep(heap: list, rank: tuple[int, int, int], match: FleetMatch) -> None:
+            nonlocal sequence
+            sequence += 1
+            item = (-rank[0], -rank[1], -rank[2], -sequence, match)
+            if len(heap) < cap:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+        first_day, last_day = 0, END_OF_TIME
+        for order, agency in enumerate(fleets):
+            for lo, hi, timeline in agency.index.timelines():
+                if hi >= NUMBER_LIMIT:
+                    continue
+                position = 0
+                while position + 1 < len(timeline) and timeline[position + 1][0] <= day:
+                    position += 1
+                first_day = max(first_day, timeline[position][0])
+                if position + 1 < len(timeline):
+                    last_day = min(last_day, timeline[position + 1][0])
+                r = timeline[position][1]
+                if r is None:
+                    continue
+                shortest: dict[str, int] = {}
+                for prefix, k in _decimal_blocks(lo, hi):
+                    length = len(prefix) + k
+                    keep(blocks.setdefault((prefix, k), []), (length, order, fleet_number_key(r.lo)), (agency, r))
+                    for cut in range(1, len(prefix) + 1):
+                        key = prefix[:cut]
+                        if shortest.get(key, length + 1) > length:
+                            shortest[key] = length
+                for key, length in shortest.items():
+                    keep(under.setdefault(key, []), (length, order, fleet_number_key(r.lo)), (agency, r))
+
+        def finish(heap: list) -> tuple[PrefixEntry, ...]:
+            return tuple(
+                (-length, -order, -lo, -seq, agency, r)
+                for length, order, lo, seq, (agency, r) in sorted(heap, reverse=True)
+            )
+
+        self._under = {key: finish(heap) for key, heap in under.items()}
+        grouped: dict[str, list[tuple[int, tuple[PrefixEntry, ...]]]] = {}
+        for (prefix, k), heap in blocks.items():
+            grouped.setdefault(prefix, []).append((k, finish(heap)))
+        self._blocks = {prefix: tuple(sorted(entries)) for prefix, entries in grouped.items()}
+        self._days = (first_day, last_day)
+
+    def covers(self, day: int) -> bool:
+        """Whether the index lists exactly the ranges in service on ``day``."""
+        return self._days[0] <= day < self._days[1]
+
+    def search(self, prefix: str, limit: int) -> list[PrefixEntry]:
+        """Return up to ``limit`` ranked entries whose ranges hold an ID starting with ``prefix``."""
+        found = list(self._under.get(prefix, ()))
+        for cut in range(1, len(prefix)):
+            for k, entries in self._blocks.get(prefix[:cut], ()):
+                if k >= len(prefix) - cut:
+                    found.extend(entries)
+        found.sort(key=lambda entry: entry[:4])
+        results: list[PrefixEntry] = []
+        seen: set[int] = set()
+        for entry in found:
+            if id(entry[5]) in seen:
+                continue
+            seen.add(id(entry[5]))
+            results.append(entry)
+            if len(results) == limit:
+                break
+        return results
+
+
+FORMAT_MAGIC = b"BUSFLEET"
+FORMAT_VERSION = 2
+
+_HEADER = struct.Struct("<8sII32s")
+_SECTION = struct.Struct("<QQ")
+_SPEC = struct.Struct("<iiIIIII")
+_AGENCY = struct.Struct("<IIIIII")
+_NO_STRING = 0xFFFFFFFF
+_NO_RANGE = 0xFFFFFFFF
+_NO_NUMBER = -(2**31)
+_NO_DATE = 0
+
+# Section order in the artifact; each section starts on an 8-byte boundary.
+_SECTIONS = (
+    "string_offsets",
+    "strings",
+    "propulsion",
+    "specs",
+    "agencies",
+    "range_lo",
+    "range_hi",
+    "range_spec",
+    "range_in_service",
+    "range_retired",
+    "segment_lo",
+    "segment_hi",
+    "segment_cells",
+    "cell_since",
+    "cell_range",
+)
+
+_RANGE_KEYS = {
+    "lo",
+    "hi",
+    "year",
+    "make",
+    "model",
+    "propulsion_type",
+    "series",
+    "length_ft",
+    "display_name",
+    "in_service",
+    "retired",
+    "verified",
+}
+_REQUIRED_RANGE_KEYS = {"lo", "hi", "year", "make", "model", "propulsion_type"}
+# Spec numbers are stored as int32 with ``_NO_NUMBER`` meaning "none".
+_NUMBER_MIN, _NUMBER_MAX = _NO_NUMBER + 1, 2**31 - 1
+
+
+def parse_fleet_source(raw: bytes | str) -> list[AgencyFleet]:
+    """Parse the JSON fleet source into ``AgencyFleet`` objects, in file order.
+
+    ``in_service`` and ``retired`` are optional ISO dates (``YYYY-MM-DD``);
+    ``retired`` is the first day out of service. ``verified`` is an editorial
+    flag for maintainers and is not compiled.
+
+    Every field is type-checked here, so bad data raises ``FleetDataError``
+    naming the agency and range rather than failing later in ``encode_fleets``.
+    """
+    try:
+        document = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise FleetDataError(f"Fleet source is not valid JSON: {exc}") from exc
+    if not isinstance(document, dict):
+        raise FleetDataError("Fleet source must be a JSON object with an 'agencies' list.")
+    agencies = _expect_list(document.get("agencies", []), "Fleet source 'agencies'")
+
+    fleets: list[AgencyFleet] = []
+    seen: set[str] = set()
+    for position, entry in enumerate(agencies):
+        if not isinstance(entry, dict):
+            raise FleetDataError(f"Agency #{position} must be an object.")
+        key = entry.get("key")
+        if not key or not isinstance(key, str) or key != key.strip().upper():
+            raise FleetDataError(f"Agency #{position} needs an upper-case string key.")
+        if key in seen:
+            raise FleetDataError(f"Agency {key} is defined twice.")
+        seen.add(key)
+        display_name = _expect_str(entry.get("display_name"), f"Agency {key}", "display_name", optional=True)
+        items = _expect_list(entry.get("ranges", []), f"Agency {key} 'ranges'")
+        ranges = [_parse_range(key, number, item) for number, item in enumerate(items)]
+        fleets.append(AgencyFleet(key, display_name or key, ranges))
+    return fleets
+
+
+def _expect_list(value: Any, where: str) -> list[Any]:
+    if not isinstance(value, list):
+        raise FleetDataError(f"{where} must be a list, not {type(value).__name__}.")
+    return value
+
+
+def _expect_str(value: Any, where: str, name: str, optional: bool = False) -> str | None:
+    if isinstance(value, str) or (optional and value is None):
+        return value
+    kind = "a string or null" if optional else "a string"
+    raise FleetDataError(f"{where} needs {kind} for {name!r}, not {value!r}.")
+
+
+def _expect_number(value: Any, where: str, name: str) -> int | None:
+    # ``bool`` is an ``int`` subclass; ``true`` is not a model year.
+    if value is None or (type(value) is int and _NUMBER_MIN <= value <= _NUMBER_MAX):
+        return value
+    raise FleetDataError(
+        f"{where} needs an integer between {_NUMBER_MIN} and {_NUMBER_MAX} or null for {name!r}, not {value!r}."
+    )
+
+
+def _parse_range(agency_key: str, number: int, item: Any) -> FleetRange:
+    where = f"{agency_key} range #{number}"
+    if not isinstance(item, dict):
+        raise FleetDataError(f"{where} must be an object, not {type(item).__name__}.")
+    unknown = item.keys() - _RANGE_KEYS
+    if unknown:
+        raise FleetDataError(f"{where} has unknown fields: {', '.join(sorted(unknown))}.")
+    missing = _REQUIRED_RANGE_KEYS - item.keys()
+    if missing:
+        raise FleetDataError(f"{where} is missing: {', '.join(sorted(missing))}.")
+    keys = {}
+    for bound in ("lo", "hi"):
+        try:
+            keys[bound] = fleet_number_key(item[bound])
+        except ValueError as exc:
+            raise FleetDataError(f"{where} needs a fleet number for {bound!r}: {exc}") from exc
+    if not same_series(keys["lo"], keys["hi"]):
+        raise FleetDataError(f"{where} spans two series: {item['lo']!r}..{item['hi']!r}.")
+    try:
+        propulsion_type = PropulsionType(item["propulsion_type"])
+    except ValueError as exc:
+        raise FleetDataError(f"{where} has unknown propulsion_type {item['propulsion_type']!r}.") from exc
+    dates: dict[str, date | None] = {}
+    for name in ("in_service", "retired"):
+        value = item.get(name)
+        try:
+            dates[name] = None if value is None else date.fromisoformat(value)
+        except (TypeError, ValueError) as exc:
+            raise FleetDataError(f"{where} needs a YYYY-MM-DD date for {name!r}, not {value!r}.") from exc
+    if not isinstance(item.get("verified", False), bool):
+        raise FleetDataError(f"{where} needs true or false for 'verified', not {item['verified']!r}.")
+    spec = FleetSpec(
+        _expect_number(item["year"], where, "year"),
+        _expect_str(item["make"], where, "make"),
+        _expect_str(item["model"], where, "model"),
+        propulsion_type,
+        _expect_str(item.get("series", ""), where, "series"),
+        _expect_number(item.get("length_ft"), where, "length_ft"),
+        display_name=_expect_str(item.get("display_name"), where, "display_name", optional=True),
+    )
+    return FleetRange(format_bus_id(keys["lo"]), format_bus_id(keys["hi"]), spec, **dates)
+
+
+def encode_fleets(fleets: Iterable[AgencyFleet], source_digest: bytes = bytes(32)) -> bytes:
+    """Serialize ``fleets`` to the binary artifact format."""
+    strings: dict[str, int] = {}
+    specs: dict[FleetSpec, int] = {}
+    propulsion_codes = {member: code for code, member in enumerate(PropulsionType)}
+
+    def sid(value: str | None) -> int:
+        if value is None:
+            return _NO_STRING
+        return strings.setdefault(value, len(strings))
+
+    def number(value: int | None) -> int:
+        return _NO_NUMBER if value is None else value
+
+    def day(value: date | None) -> int:
+        return _NO_DATE if value is None else value.toordinal()
+
+    spec_records = bytearray()
+    agency_records = bytearray()
+    range_lo, range_hi, range_spec = array("q"), array("q"), array("I")
+    range_in_service, range_retired = array("i"), array("i")
+    segment_lo, segment_hi, segment_cells = array("q"), array("q"), array("I", [0])
+    cell_since, cell_range = array("i"), array("I")
+    propulsion = array("I", (sid(member.value) for member in PropulsionType))
+
+    for agency in fleets:
+        range_start, segment_start = len(range_lo), len(segment_lo)
+        positions: dict[int, int] = {}
+        for r in agency.ranges:
+            spec_id = specs.get(r.spec)
+            if spec_id is None:
+                spec = r.spec
+                spec_id = specs[spec] = len(specs)
+                spec_records += _SPEC.pack(
+                    number(spec.year),
+                    number(spec.length_ft),
+                    propulsion_codes[spec.propulsion_type],
+                    sid(spec.make),
+                    sid(spec.model),
+                    sid(spec.series),
+                    sid(spec.display_name),
+                )
+            positions[id(r)] = len(range_lo)
+            range_lo.append(fleet_number_key(r.lo))
+            range_hi.append(fleet_number_key(r.hi))
+            range_spec.append(spec_id)
+            range_in_service.append(day(r.in_service))
+            range_retired.append(day(r.retired))
+        for lo, hi, timeline in agency.index.timelines():
+            segment_lo.append(lo)
+            segment_hi.append(hi)
+            for since, r in timeline:
+                cell_since.append(since)
+                cell_range.append(_NO_RANGE if r is None else positions[id(r)])
+            segment_cells.append(len(cell_since))
+        agency_records += _AGENCY.pack(
+            sid(agency.key),
+            sid(agency.display_name),
+            range_start,
+            len(range_lo) - range_start,
+            segment_start,
+            len(segment_lo) - segment_start,
+        )
+
+    string_offsets = array("I", [0])
+    string_blob = bytearray()
+    for value in strings:
+        string_blob += value.encode("utf-8")
+        string_offsets.append(len(string_blob))
+
+    payloads = {
+        "string_offsets": string_offsets.tobytes(),
+        "strings": bytes(string_blob),
+        "propulsion": propulsion.tobytes(),
+        "specs": bytes(spec_records),
+        "agencies": bytes(agency_records),
+        "range_lo": range_lo.tobytes(),
+        "range_hi": range_hi.tobytes(),
+        "range_spec": range_spec.tobytes(),
+        "range_in_service": range_in_service.tobytes(),
+        "range_retired": range_retired.tobytes(),
+        "segment_lo": segment_lo.tobytes(),
+        "segment_hi": segment_hi.tobytes(),
+        "segment_cells": segment_cells.tobytes(),
+        "cell_since": cell_since.tobytes(),
+        "cell_range": cell_range.tobytes(),
+    }
+    if sys.byteorder != "little":
+        raise FleetDataError("The fleet artifact format is little-endian only.")
+
+    out = bytearray(_HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, len(_SECTIONS), source_digest))
+    table_at = len(out)
+    out += bytes(_SECTION.size * len(_SECTIONS))
+    for number_, name in enumerate(_SECTIONS):
+        out += bytes(-len(out) % 8)
+        _SECTION.pack_into(out, table_at + number_ * _SECTION.size, len(out), len(payloads[name]))
+        out += payloads[name]
+    return bytes(out)
+
+
+def compile_fleet_data(source: str | os.PathLike[str], target: str | os.PathLike[str]) -> None:
+    """Compile the JSON ``source`` into the binary artifact at ``target``.
+
+    The artifact is written beside the target and renamed over it, so processes
+    that already mapped the previous file keep reading a consistent copy.
+    """
+    raw = Path(source).read_bytes()
+    _write_artifact(encode_fleets(parse_fleet_source(raw), hashlib.sha256(raw).digest()), target)
+
+
+def _write_artifact(blob: bytes, target: str | os.PathLike[str]) -> None:
+    target = Path(target)
+    scratch = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        scratch.write_bytes(blob)
+        os.replace(scratch, target)
+    except OSError:
+        scratch.unlink(missing_ok=True)
+        raise
+
+
+def _read_header(head: bytes) -> tuple[int, bytes]:
+    if len(head) < _HEADER.size:
+        raise FleetDataError("Fleet artifact is truncated.")
+    magic, version, section_count, digest = _HEADER.unpack_from(head)
+    if magic != FORMAT_MAGIC:
+        raise FleetDataError("Not a compiled fleet artifact.")
+    if version != FORMAT_VERSION or section_count != len(_SECTIONS):
+        raise FleetDataError(f"Fleet artifact format {version} is not supported (expected {FORMAT_VERSION}).")
+    return version, digest
+
+
+def artifact_source_digest(path: str | os.PathLike[str]) -> bytes | None:
+    """Return the source digest recorded in an artifact, or ``None`` if it is missing or unreadable."""
+    try:
+        with open(path, "rb") as fh:
+            return _read_header(fh.read(_HEADER.size))[1]
+    except (OSError, FleetDataError):
+        return None
+
+
+class _RangeDecoder:
+    """Decodes specs and ranges from a ``FleetStore``'s sections and caches them.
+
+    Split from the store so ``_LazyRanges`` need not point back at it: the
+    store and its agencies form no reference cycle, and a replaced snapshot
+    is freed by reference counting even from the collector's frozen
+    generation.
+    """
+
+    __slots__ = (
+        "_string_offsets",
+        "_strings",
+        "_specs_raw",
+        "_range_lo",
+        "_range_hi",
+        "_range_spec",
+        "_range_in_service",
+        "_range_retired",
+        "_propulsion",
+        "_spec_cache",
+        "_range_cache",
+    )
+
+    def __init__(self, sections: Mapping[str, memoryview]) -> None:
+        self._string_offsets = sections["string_offsets"].cast("I")
+        self._strings = sections["strings"]
+        self._specs_raw = sections["specs"]
+        self._range_lo = sections["range_lo"].cast("q")
+        self._range_hi = sections["range_hi"].cast("q")
+        self._range_spec = sections["range_spec"].cast("I")
+        self._range_in_service = sections["range_in_service"].cast("i")
+        self._range_retired = sections["range_retired"].cast("i")
+        self._propulsion = tuple(PropulsionType(self.string(code)) for code in sections["propulsion"].cast("I"))
+        self._spec_cache: list[FleetSpec | None] = [None] * (len(self._specs_raw) // _SPEC.size)
+        self._range_cache: list[FleetRange | None] = [None] * len(self._range_lo)
+
+    def __len__(self) -> int:
+        return len(self._range_lo)
+
+    def string(self, string_id: int) -> str | None:
+        if string_id == _NO_STRING:
+            return None
+        start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+        return str(self._strings[start:end], "utf-8")
+
+    def spec_at(self, position: int) -> FleetSpec:
+        spec = self._spec_cache[position]
+        if spec is None:
+            year, length_ft, propulsion, make, model, series, display_name = _SPEC.unpack_from(
+                self._specs_raw, position * _SPEC.size
+            )
+            spec = self._spec_cache[position] = FleetSpec(
+                None if year == _NO_NUMBER else year,
+                self.string(make),
+                self.string(model),
+                self._propulsion[propulsion],
+                self.string(series),
+                None if length_ft == _NO_NUMBER else length_ft,
+                display_name=self.string(display_name),
+            )
+        return spec
+
+    def range_at(self, position: int) -> FleetRange:
+        r = self._range_cache[position]
+        if r is None:
+            in_service, retired = self._range_in_service[position], self._range_retired[position]
+            r = self._range_cache[position] = FleetRange(
+                format_bus_id(self._range_lo[position]),
+                format_bus_id(self._range_hi[position]),
+                self.spec_at(self._range_spec[position]),
+                in_service=None if in_service == _NO_DATE else date.fromordinal(in_service),
+                retired=None if retired == _NO_DATE else date.fromordinal(retired),
+            )
+        return r
+
+
+class _LazyRanges(Sequence[Union[FleetRange, None]]):
+    """Ranges decoded from a ``FleetStore`` on access, addressed by artifact position.
+
+    ``_NO_RANGE`` positions, timeline entries with no range in service, read as ``None``.
+    """
+
+    __slots__ = ("_decoder", "_positions")
+
+    def __init__(self, decoder: _RangeDecoder, positions: Sequence[int]) -> None:
+        self._decoder = decoder
+        self._positions = positions
+
+    def _range(self, position: int) -> FleetRange | None:
+        return None if position == _NO_RANGE else self._decoder.range_at(position)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._range(position) for position in self._positions[i]]
+        return self._range(self._positions[i])
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
+class FleetStore(Mapping[str, AgencyFleet]):
+    """Read-only, lazily decoded view of a compiled fleet artifact.
+
+    Integer arrays are used in place from the memory map; agencies, ranges and
+    specs become Python objects the first time they are read and are then
+    reused, so identity comparisons between lookups hold.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], blob: bytes | None = None) -> None:
+        """Map the artifact at ``path``, or read it from ``blob`` when that holds its contents."""
+        self.path = Path(path)
+        if blob is not None:
+            self._map = blob
+        else:
+            with open(self.path, "rb") as fh:
+                self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        _, self.source_digest = _read_header(view[: _HEADER.size])
+        sections: dict[str, memoryview] = {}
+        for number, name in enumerate(_SECTIONS):
+            offset, length = _SECTION.unpack_from(view, _HEADER.size + number * _SECTION.size)
+            if offset + length > len(view):
+                raise FleetDataError(f"Fleet artifact section {name!r} is truncated.")
+            sections[name] = view[offset : offset + length]
+
+        self._decoder = _RangeDecoder(sections)
+        self._agencies_raw = sections["agencies"]
+        self._segment_lo = sections["segment_lo"].cast("q")
+        self._segment_hi = sections["segment_hi"].cast("q")
+        self._segment_cells = sections["segment_cells"].cast("I")
+        self._cell_since = sections["cell_since"].cast("i")
+        self._cell_ranges = _LazyRanges(self._decoder, sections["cell_range"].cast("I"))
+
+        self._keys = {
+            self._decoder.string(_AGENCY.unpack_from(self._agencies_raw, i * _AGENCY.size)[0]): i
+            for i in range(len(self._agencies_raw) // _AGENCY.size)
+        }
+        self._fleets: dict[str, AgencyFleet] = {}
+
+    def spec_at(self, position: int) -> FleetSpec:
+        return self._decoder.spec_at(position)
+
+    def range_at(self, position: int) -> FleetRange:
+        return self._decoder.range_at(position)
+
+    def __getitem__(self, key: str) -> AgencyFleet:
+        fleet = self._fleets.get(key)
+        if fleet is None:
+            record = _AGENCY.unpack_from(self._agencies_raw, self._keys[key] * _AGENCY.size)
+            _, display_name, range_start, range_count, segment_start, segment_count = record
+            segments = slice(segment_start, segment_start + segment_count)
+            index = FleetIndex.from_arrays(
+                self._segment_lo[segments],
+                self._segment_hi[segments],
+                self._segment_cells[segment_start : segment_start + segment_count + 1],
+                self._cell_since,
+                self._cell_ranges,
+            )
+            ranges = _LazyRanges(self._decoder, range(range_start, range_start + range_count))
+            fleet = self._fleets.setdefault(key, AgencyFleet(key, self._decoder.string(display_name), ranges, index))
+        return fleet
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+
+def load_fleet_store(source: str | os.PathLike[str], artifact: str | os.PathLike[str]) -> FleetStore:
+    """Map ``artifact``, recompiling it first when ``source`` exists and has changed.
+
+    If the recompiled artifact cannot be written, as on a read-only volume, it
+    is logged and the store is served from memory instead.
+    """
+    source = Path(source)
+    if source.exists():
+        raw = source.read_bytes()
+        digest = hashlib.sha256(raw).digest()
+        if artifact_source_digest(artifact) != digest:
+            blob = encode_fleets(parse_fleet_source(raw), digest)
+            try:
+                _write_artifact(blob, artifact)
+            except OSError as exc:
+                logger.warning("Could not write fleet artifact %s, serving it from memory: %s", artifact, exc)
+                return FleetStore(artifact, blob)
+    return FleetStore(artifact)
+
+
+STORE_OBJECTS_MAGIC = b"BUSOBJ02"
+
+_OBJECTS_HEADER = struct.Struct("<8sIQI")
+
+
+def _store_references(store: FleetStore) -> list[Any]:
+    """Every agency in store order, then every range by position; pickles refer to them by index."""
+    references: list[Any] = [store[key] for key in store]
+    references.extend(store.range_at(position) for position in range(len(store._decoder)))
+    return references
+
+
+def _store_reference(number: int) -> Any:
+    """Stands in for ``_store_references(store)[number]``; ``_StoreUnpickler`` resolves it."""
+    raise pickle.UnpicklingError("Store references can only be loaded with load_store_objects.")
+
+
+class _StorePickler(pickle.Pickler):
+    """Pickler writing the store's agencies and ranges as indexes into ``_store_references``.
+
+    ``reducer_override`` is skipped for builtin containers and scalars, and each
+    reduced object is memoized, so a store object costs one call however often
+    it is referenced.
+    """
+
+    def __init__(self, file: io.BytesIO, store: FleetStore, buffer_callback) -> None:
+        super().__init__(file, protocol=5, buffer_callback=buffer_callback)
+        self._references = {id(obj): number for number, obj in enumerate(_store_references(store))}
+
+    def reducer_override(self, obj: Any) -> Any:
+        number = self._references.get(id(obj))
+        return NotImplemented if number is None else (_store_reference, (number,))
+
+
+# Globals any store pickle may load besides the caller's classes.
+_SAFE_GLOBALS = {
+    ("array", "array"),
+    ("array", "_array_reconstructor"),
+    ("builtins", "bytearray"),
+    ("builtins", "dict"),
+    ("builtins", "frozenset"),
+    ("builtins", "list"),
+    ("builtins", "set"),
+    ("builtins", "tuple"),
+}
+
+
+class _StoreUnpickler(pickle.Unpickler):
+    """Unpickler resolving store references and loading no globals beyond an allowlist."""
+
+    def __init__(
+        self, file: io.BytesIO, store: FleetStore, buffers: list[memoryview], classes: Iterable[type]
+    ) -> None:
+        super().__init__(file, buffers=buffers)
+        self._resolve = _store_references(store).__getitem__
+        self._allowed = _SAFE_GLOBALS | {(cls.__module__, cls.__qualname__) for cls in classes}
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module == __name__ and name == "_store_reference":
+            return self._resolve
+        if (module, name) not in self._allowed:
+            raise pickle.UnpicklingError(f"Global {module}.{name} is not allowed in a store pickle.")
+        return super().find_class(module, name)
+
+
+def dump_store_objects(path: str | os.PathLike[str], store: FleetStore, key: bytes, obj: Any) -> None:
+    """Pickle ``obj``, which may refer to ``store``'s agencies and ranges, to ``path`` tagged with ``key``.
+
+    ``key`` should digest everything ``obj`` was built from. ``PickleBuffer``
+    payloads are stored out of band, 8-byte aligned after the pickle stream,
+    and come back as read-only views of a memory map. The file is written
+    beside ``path`` and renamed over it.
+    """
+    buffers: list[pickle.PickleBuffer] = []
+    stream = io.BytesIO()
+    _StorePickler(stream, store, buffers.append).dump(obj)
+    pickled = stream.getbuffer()
+
+    head = bytearray(_OBJECTS_HEADER.pack(STORE_OBJECTS_MAGIC, len(key), len(pickled), len(buffers)) + key)
+    table_at = len(head)
+    head += bytes(_SECTION.size * len(buffers))
+    offset = len(head) + len(pickled)
+    for number, buffer in enumerate(buffers):
+        offset += -offset % 8
+        length = buffer.raw().nbytes
+        _SECTION.pack_into(head, table_at + number * _SECTION.size, offset, length)
+        offset += length
+
+    target = Path(path)
+    scratch = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with open(scratch, "wb") as fh:
+        fh.write(head)
+        fh.write(pickled)
+        for buffer in buffers:
+            fh.write(bytes(-fh.tell() % 8))
+            fh.write(buffer.raw())
+    os.replace(scratch, target)
+
+
+def load_store_objects(
+    path: str | os.PathLike[str], store: FleetStore, key: bytes, classes: Iterable[type] = ()
+) -> Any | None:
+    """Return the object ``dump_store_objects`` saved for ``key`` against ``store``.
+
+    The file is memory-mapped: only the pickle stream is parsed, and the
+    buffers stay in the page cache, shared by every process that loads them.
+    Returns ``None`` when the file is missing or was saved under another key.
+    Only ``classes``, arrays and builtin containers are loaded. Any other
+    global raises ``pickle.UnpicklingError``, so a crafted file cannot run
+    code, though it can still change the loaded objects' contents.
+    """
+    try:
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    view = memoryview(mapped)
+    if len(view) < _OBJECTS_HEADER.size:
+        return None
+    magic, key_length, pickled_length, buffer_count = _OBJECTS_HEADER.unpack_from(view)
+    start = _OBJECTS_HEADER.size
+    if magic != STORE_OBJECTS_MAGIC or view[start : start + key_length] != key:
+        return None
+    start += key_length
+    buffers = []
+    for number in range(buffer_count):
+        offset, length = _SECTION.unpack_from(view, start + number * _SECTION.size)
+        buffers.append(view[offset : offset + length])
+    start += buffer_count * _SECTION.size
+    return _StoreUnpickler(io.BytesIO(view[start : start + pickled_length]), store, buffers, classes).load()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile fleet JSON into the binary artifact.")
+    parser.add_argument("source", nargs="?", default="data/fleets.json")
+    parser.add_argument("target", nargs="?", default="data/fleets.bin")
+    args = parser.parse_args()
+    compile_fleet_data(args.source, args.target)
+    store = FleetStore(args.target)
+    print(f"{args.target}: {len(store)} agencies, {store.path.stat().st_size} bytes")
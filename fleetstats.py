@@ -0,0 +1,212 @@
+"""Columnar fleet composition statistics.
+
+``FleetStats`` lays every agency's lookup segments out as parallel integer
+columns: bus count (``hi - lo + 1``), agency, propulsion type, model year,
+length and make, each dictionary-encoded with code 0 for "unknown". Segments
+rather than declared ranges are counted, so an ID claimed by two overlapping
+ranges of one agency is counted once, under the range a lookup would return.
+Only ranges in service on the day the columns are built (today unless given)
+are counted, so a reused fleet number counts once.
+
+Group-by counts are computed with NumPy when it is installed (imported on
+first use) and with a plain loop otherwise; both give the same answer.
+Results are memoized on the instance, which lives as long as its snapshot.
+"""
+
+import threading
+from array import array
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from fleetdata import AgencyFleet, PropulsionType
+
+DIMENSIONS = ("agency", "propulsion_type", "year", "length_ft", "make")
+RESULT_CACHE_SIZE = 256
+
+_numpy: Any = None
+
+
+def _load_numpy() -> Any:
+    """Return the numpy module, or ``False`` when it is not installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy
+
+
+class _Column:
+    """One dictionary-encoded dimension: ``codes[i]`` indexes ``values``, 0 meaning unknown.
+
+    After ``sort_values`` codes follow value order, so comparing codes compares values.
+    """
+
+    __slots__ = ("values", "codes", "_lookup")
+
+    def __init__(self) -> None:
+        self.values: list[Any] = [None]
+        self.codes = array("i")
+        self._lookup: dict[Any, int] = {None: 0}
+
+    def append(self, value: Any) -> None:
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def sort_values(self) -> None:
+        ordered = [None, *sorted(self.values[1:])]
+        self._lookup = {value: code for code, value in enumerate(ordered)}
+        remap = [self._lookup[value] for value in self.values]
+        self.codes = array("i", [remap[code] for code in self.codes])
+        self.values = ordered
+
+    def code_of(self, value: Any) -> int | None:
+        return self._lookup.get(value)
+
+
+class FleetStats:
+    """Bus counts over every agency's segments in service on ``day`` (a date ordinal), grouped by ``DIMENSIONS``."""
+
+    def __init__(self, fleets: Iterable[AgencyFleet], day: int | None = None) -> None:
+        self.buses = array("q")
+        self.years = array("i")
+        self.columns = {dimension: _Column() for dimension in DIMENSIONS}
+        agency, propulsion_type, year, length_ft, make = (self.columns[d] for d in DIMENSIONS)
+        for fleet in fleets:
+            for lo, hi, fleet_range in fleet.index.segments(day):
+                spec = fleet_range.spec
+                self.buses.append(hi - lo + 1)
+                self.years.append(-1 if spec.year is None else spec.year)
+                agency.append(fleet.key)
+                propulsion_type.append(spec.propulsion_type.value)
+                year.append(spec.year)
+                length_ft.append(spec.length_ft)
+                make.append(spec.make or None)
+        for column in self.columns.values():
+            column.sort_values()
+        self._results: dict[tuple, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.buses)
+
+    def group_counts(
+        self,
+        by: Sequence[str],
+        *,
+        agencies: Iterable[str] = (),
+        propulsion_types: Iterable[PropulsionType] = (),
+        year_from: int | None = None,
+        year_to: int | None = None,
+    ) -> dict[str, Any]:
+        """Return ``{"total": buses, "groups": [...]}`` for the rows passing every filter.
+
+        Each group is a dict of the ``by`` dimension values plus ``buses``,
+        ordered by descending count, then by value with unknown first.
+        Unknown values come back as ``None``.
+        A year filter drops ranges whose year is unknown.
+        """
+        for dimension in by:
+            if dimension not in self.columns:
+                raise ValueError(f"Cannot group by {dimension!r}.")
+        key = (
+            tuple(by),
+            tuple(sorted(set(agencies))),
+            tuple(sorted({p.value for p in propulsion_types})),
+            year_from,
+            year_to,
+        )
+        result = self._results.get(key)
+        if result is None:
+            filters = {"agency": key[1], "propulsion_type": key[2]}
+            numpy = _load_numpy()
+            if numpy:
+                counts = self._group_numpy(numpy, key[0], filters, year_from, year_to)
+            else:
+                counts = self._group_python(key[0], filters, year_from, year_to)
+            result = self._format(key[0], counts)
+            with self._lock:
+                if len(self._results) >= RESULT_CACHE_SIZE:
+                    self._results.clear()
+                self._results[key] = result
+        return result
+
+    def _filter_codes(self, filters: dict[str, tuple]) -> dict[str, set[int]]:
+        return {
+            dimension: {code for value in values if (code := self.columns[dimension].code_of(value)) is not None}
+            for dimension, values in filters.items()
+            if values
+        }
+
+    def _group_python(
+        self, by: tuple[str, ...], filters: dict[str, tuple], year_from: int | None, year_to: int | None
+    ) -> list[tuple[tuple[int, ...], int]]:
+        wanted = self._filter_codes(filters)
+        filter_columns = [(self.columns[d].codes, codes) for d, codes in wanted.items()]
+        group_columns = [self.columns[d].codes for d in by]
+        totals: dict[tuple[int, ...], int] = {}
+        for row, buses in enumerate(self.buses):
+            if year_from is not None or year_to is not None:
+                year = self.years[row]
+                if year < 0 or (year_from is not None and year < year_from) or (year_to is not None and year > year_to):
+                    continue
+            if any(codes[row] not in allowed for codes, allowed in filter_columns):
+                continue
+            group = tuple(codes[row] for codes in group_columns)
+            totals[group] = totals.get(group, 0) + buses
+        return sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+
+    def _group_numpy(
+        self, np: Any, by: tuple[str, ...], filters: dict[str, tuple], year_from: int | None, year_to: int | None
+    ) -> list[tuple[tuple[int, ...], int]]:
+        buses = np.frombuffer(self.buses, dtype=np.int64)
+        mask = np.ones(len(buses), dtype=bool)
+        if year_from is not None or year_to is not None:
+            years = np.frombuffer(self.years, dtype=np.int32)
+            mask &= years >= (0 if year_from is None else year_from)
+            if year_to is not None:
+                mask &= years <= year_to
+        for dimension, allowed in self._filter_codes(filters).items():
+            codes = np.frombuffer(self.columns[dimension].codes, dtype=np.int32)
+            mask &= np.isin(codes, np.fromiter(allowed, dtype=np.int32, count=len(allowed)))
+
+        # Fold the group codes into one int64 key per row; key order is value order.
+        keys = np.zeros(int(mask.sum()), dtype=np.int64)
+        space = 1
+        for dimension in by:
+            cardinality = len(self.columns[dimension].values)
+            keys *= cardinality
+            keys += np.frombuffer(self.columns[dimension].codes, dtype=np.int32)[mask]
+            space *= cardinality
+        weights = buses[mask]
+        if space <= max(len(keys), 1 << 16):
+            sums = np.bincount(keys, weights=weights, minlength=space)
+            distinct = np.flatnonzero(sums)
+            sums = sums[distinct]
+        else:
+            distinct, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse, weights=weights, minlength=len(distinct))
+        sums = sums.round().astype(np.int64)
+        order = np.lexsort((distinct, -sums))
+        distinct, sums = distinct[order], sums[order]
+
+        columns = []
+        for dimension in reversed(by):
+            cardinality = len(self.columns[dimension].values)
+            columns.append((distinct % cardinality).tolist())
+            distinct = distinct // cardinality
+        return list(zip(zip(*reversed(columns)) if columns else [()] * len(sums), sums.tolist()))
+
+    def _format(self, by: tuple[str, ...], counts: list[tuple[tuple[int, ...], int]]) -> dict[str, Any]:
+        columns = [self.columns[d] for d in by]
+        groups = []
+        for codes, buses in counts:
+            group: dict[str, Any] = {d: column.values[code] for d, column, code in zip(by, columns, codes)}
+            group["buses"] = buses
+            groups.append(group)
+        return {"total": sum(buses for _, buses in counts), "groups": groups}
@@ -1,308 +1,287 @@
+import base64
+import functools
+import gc
+import gzip
+import hashlib
+import hmac
+import json
+import logging
 import os
+import pickle
+import random
 import secrets
-from dataclasses import dataclass
-from typing import Any, Union
-from enum import Enum
+import signal
+import sys
+import threading
+import time
+from array import array
+from collections.abc import Iterable, Mapping, Sequence
+from contextlib import asynccontextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any
 from urllib.parse import urlparse
-from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi import Body, Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+import fleetcheck
+import fleetdata
+from fleetdata import (
+    AgencyFleet,
+    BusID,
+    CoverageIndex,
+    FleetDataError,
+    FleetIndex,
+    FleetMatch,
+    FleetRange,
+    FleetSpec,
+    FleetStore,
+    PrefixIndex,
+    PropulsionType,
+    bus_id_key,
+    dump_store_objects,
+    fleet_number_key,
+    load_fleet_store,
+    load_store_objects,
+    parse_fleet_source,
+    today,
+)
+from fleetcheck import ValidationIssue, ValidationReport, validate_fleets
+from fleetstats import DIMENSIONS as STATS_DIMENSIONS, FleetStats
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
 
 load_dotenv()
 
-BusID = Union[int, str]
-
+logger = logging.getLogger(__name__)
 
-SESSION_SECRET = os.getenv("SESSION_SECRET") or secrets.token_urlsafe(32)
+SESSION_SECRET = os.getenv("SESSION_SECRET", "")
+if not SESSION_SECRET:
+    # Exported so processes forked or spawned from this one sign cookies alike;
+    # independently started processes (e.g. ``uvicorn --workers``) must set it.
+    SESSION_SECRET = os.environ["SESSION_SECRET"] = secrets.token_urlsafe(32)
 SESSION_COOKIE_SAMESITE = os.getenv("SESSION_COOKIE_SAMESITE", "lax").lower()
 if SESSION_COOKIE_SAMESITE not in {"lax", "strict", "none"}:
     SESSION_COOKIE_SAMESITE = "lax"
 SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "").lower() in {"1", "true", "yes", "on"}
-CSRF_SESSION_KEY = secrets.token_urlsafe(16)
+CSRF_SESSION_KEY = "csrf_" + hmac.new(SESSION_SECRET.encode(), b"csrf-session-key", hashlib.sha256).hexdigest()[:16]
+CSRF_MODE = os.getenv("CSRF_MODE", "session").lower()
+if CSRF_MODE not in {"session", "stateless"}:
+    CSRF_MODE = "session"
+CSRF_COOKIE_NAME = os.getenv("CSRF_COOKIE_NAME", "csrftoken")
+CSRF_TOKEN_MAX_AGE = int(os.getenv("CSRF_TOKEN_MAX_AGE", str(14 * 24 * 60 * 60)))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+SUGGEST_MAX_RESULTS = int(os.getenv("SUGGEST_MAX_RESULTS", "20"))
+API_CACHE_CONTROL = os.getenv("API_CACHE_CONTROL", "no-cache")
+LANDING_CACHE_CONTROL = os.getenv("LANDING_CACHE_CONTROL", "no-cache")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+FLEET_DATA_SOURCE = os.getenv("FLEET_DATA_SOURCE", "data/fleets.json")
+FLEET_DATA_PATH = os.getenv("FLEET_DATA_PATH", "data/fleets.bin")
+# Built indexes and pre-rendered payloads are cached here between starts; empty disables it.
+FLEET_SNAPSHOT_PATH = os.getenv("FLEET_SNAPSHOT_PATH", "data/snapshot.bin")
+FLEET_DATA_WATCH_INTERVAL = float(os.getenv("FLEET_DATA_WATCH_INTERVAL", "0"))
+FLEET_DATA_VALIDATION = os.getenv("FLEET_DATA_VALIDATION", "warn").lower()
+if FLEET_DATA_VALIDATION not in {"off", "warn", "strict"}:
+    FLEET_DATA_VALIDATION = "warn"
+FLEET_DATA_REPORT = os.getenv("FLEET_DATA_REPORT", "")
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "").lower() in {"1", "true", "yes", "on"}
+METRICS_SAMPLE_RATE = min(max(float(os.getenv("METRICS_SAMPLE_RATE", "0.1")), 0.0), 1.0)
+# Set by serve.py in prefork workers: the supervisor then owns the source watcher
+# and rolls every worker onto reloaded data.
+SUPERVISOR_PID: int | None = None
+
+# Counters are exact whenever METRICS_ENABLED is set. Timings are only taken for
+# the METRICS_SAMPLE_RATE share of requests picked by MetricsMiddleware, so
+# histogram counts are a sample, not a request count.
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram(
+    "fleet_request_duration_seconds", "Sampled end-to-end request latency by route.", ("route",)
+)
+PHASE_SECONDS = metrics.histogram(
+    "fleet_phase_duration_seconds", "Sampled time spent in each hot-path phase.", ("phase",)
+)
+LOOKUPS = metrics.counter(
+    "fleet_lookups_total", "Single fleet lookups by agency and outcome.", ("agency", "outcome")
+)
+RESPONSE_CACHE_LOOKUPS = metrics.counter(
+    "fleet_response_cache_total", "Pre-rendered response lookups; result=render is a cache miss.", ("result",)
+)
+CONDITIONAL_REQUESTS = metrics.counter(
+    "fleet_conditional_requests_total", "Lookups sent with If-None-Match, by whether the ETag matched.", ("result",)
+)
+_metrics_sampled: ContextVar[bool] = ContextVar("metrics_sampled", default=False)
+
+
+def _phase(name: str):
+    """Context manager timing ``name`` when the current request is sampled."""
+    return _PhaseTimer(name) if _metrics_sampled.get() else nullcontext()
+
+
+class _PhaseTimer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        PHASE_SECONDS.observe((self.name,), time.perf_counter() - self.started)
+
+
+def _timed(name: str):
+    """Decorator form of ``_phase``; a no-op unless METRICS_ENABLED is set at import."""
+
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _metrics_sampled.get():
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PHASE_SECONDS.observe((name,), time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if SUPERVISOR_PID is None:
+        # Frozen once, the startup snapshot is never rescanned by the collector,
+        # so no early request stalls on a full collection. A replaced snapshot
+        # has no reference cycles and is still freed. serve.py freezes before forking.
+        gc.freeze()
+    stop = threading.Event()
+    if FLEET_DATA_WATCH_INTERVAL > 0 and SUPERVISOR_PID is None:
+        threading.Thread(
+            target=_watch_fleet_source, args=(stop, FLEET_DATA_WATCH_INTERVAL), name="fleet-watch", daemon=True
+        ).start()
+    try:
+        yield
+    finally:
+        stop.set()
+
+
+class MetricsMiddleware:
+    """Pick the requests whose phases get timed and record their total latency."""
+
+    def __init__(self, app, sample_rate: float) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+        token = _metrics_sampled.set(True)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - started
+            _metrics_sampled.reset(token)
+            route = scope.get("route")
+            REQUEST_SECONDS.observe((getattr(route, "path", "other"),), elapsed)
+
+
+class _TimedSigner:
+    """Wraps the session middleware's signer so cookie decode and encode show up as phases."""
+
+    def __init__(self, signer) -> None:
+        self._signer = signer
+
+    def unsign(self, *args, **kwargs):
+        with _phase("session_decode"):
+            return self._signer.unsign(*args, **kwargs)
+
+    def sign(self, *args, **kwargs):
+        with _phase("session_encode"):
+            return self._signer.sign(*args, **kwargs)
+
+
+class PathExemptSessionMiddleware(SessionMiddleware):
+    """Session middleware that passes requests under ``exempt_prefixes`` straight through.
+
+    Exempt requests skip cookie decoding, signature checks and re-signing, and
+    have no ``request.session``.
+    """
+
+    def __init__(self, app, exempt_prefixes: tuple[str, ...] = (), **kwargs) -> None:
+        super().__init__(app, **kwargs)
+        self.exempt_prefixes = exempt_prefixes
+        if METRICS_ENABLED:
+            self.signer = _TimedSigner(self.signer)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and self.exempt_prefixes and scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
-    SessionMiddleware,
+    PathExemptSessionMiddleware,
+    exempt_prefixes=("/api/",) if CSRF_MODE == "stateless" else (),
     secret_key=SESSION_SECRET,
     same_site=SESSION_COOKIE_SAMESITE,
     https_only=SESSION_COOKIE_SECURE,
 )
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, sample_rate=METRICS_SAMPLE_RATE)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-templates = Jinja2Templates(directory="templates")
-
-class PropulsionType(Enum):
-    CNG = "CNG"
-    BATTERY_ELECTRIC = "Battery Electric"
-    TROLLEY = "Trolley"
-    HYBRID_ELECTRIC = "Hybrid Electric"
-    DIESEL_ELECTRIC = "Diesel Electric"
-    DIESEL = "Diesel"
-    HYDROGEN_FUEL_CELL = "Hydrogen Fuel Cell"
-
-@dataclass(frozen=True)
-class FleetSpec:
-    year: int | None
-    make: str
-    model: str
-    propulsion_type: PropulsionType
-    series: str = ""
-    length_ft: int | None = None
-    display_name: str | None = None
-
-@dataclass(frozen=True)
-class FleetRange:
-    lo: BusID
-    hi: BusID
-    spec: FleetSpec
-
-@dataclass(frozen=True)
-class AgencyFleet:
-    key: str
-    display_name: str
-    ranges: list[FleetRange]
-
-WMATA = [
-    # Battery electric
-    FleetRange(1040, 1044, FleetSpec(2025, "Nova Bus", "LFSe+", PropulsionType.BATTERY_ELECTRIC, "LFS", 40, display_name="2025 Nova Bus LFSe+")),
-    FleetRange(1045, 1049, FleetSpec(2024, "New Flyer", "XE40", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 40)),
-    FleetRange(1060, 1061, FleetSpec(2024, "New Flyer", "XE60", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 60)),
-
-    # Hybrid (diesel-electric)
-    FleetRange(6462, 6609, FleetSpec(2010, "New Flyer", "DE42LFA", PropulsionType.DIESEL_ELECTRIC, "Low Floor Advanced", 42)),
-    FleetRange(7001, 7152, FleetSpec(2011, "New Flyer", "XDE40", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 40)),
-    FleetRange(7153, 7272, FleetSpec(2012, "New Flyer", "XDE40", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 40)),
-    FleetRange(7300, 7409, FleetSpec(2016, "New Flyer", "XDE40", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 40)),
-    FleetRange(8001, 8105, FleetSpec(2014, "NABI", "42-BRT", PropulsionType.DIESEL_ELECTRIC, "BRT", 42, display_name="2014 NABI 42-BRT")),
-    FleetRange(5460, 5480, FleetSpec(2015, "New Flyer", "XDE60", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 60)),
-    FleetRange(5481, 5492, FleetSpec(2018, "New Flyer", "XDE60", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 60)),
-
-    # CNG
-    FleetRange(2830, 2993, FleetSpec(2015, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(3100, 3199, FleetSpec(2018, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(3200, 3274, FleetSpec(2019, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(3275, 3349, FleetSpec(2020, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-
-    # Diesel
-    FleetRange(4450, 4474, FleetSpec(2019, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(4475, 4499, FleetSpec(2020, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(4500, 4598, FleetSpec(2021, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(4600, 4700, FleetSpec(2022, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(4701, 4795, FleetSpec(2023, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(5500, 5541, FleetSpec(2020, "New Flyer", "XD60", PropulsionType.DIESEL, "Xcelsior®", 60)),
-    
-    # Future
-    FleetRange(3350, 3374, FleetSpec(None, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(7410, 7484, FleetSpec(None, "New Flyer", "XDE40", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 40)),
-    # FleetRange(None, None, FleetSpec(None, "New Flyer", "XE35", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 35)), # prospective fleet and not yet assigned IDs
-]
-
-RIDEON = [
-    FleetRange(5726, 5746, FleetSpec(2008, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 40)),
-    FleetRange(5747, 5757, FleetSpec(2009, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 40)),
-    FleetRange(5007, 5031, FleetSpec(2009, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 29)),
-    FleetRange(5758, 5758, FleetSpec(2011, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 40)),
-
-    FleetRange(5349, 5360, FleetSpec(2011, "GILLIG", "Hybrid", PropulsionType.HYBRID_ELECTRIC, "Low Floor", 40)),
-    FleetRange(5361, 5367, FleetSpec(2012, "GILLIG", "Hybrid", PropulsionType.HYBRID_ELECTRIC, "Low Floor", 40)),
-
-    FleetRange(5759, 5770, FleetSpec(2013, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 40)),
-    FleetRange(5032, 5059, FleetSpec(2013, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 29)),
-
-    FleetRange(5837, 5855, FleetSpec(2014, "GILLIG", "", PropulsionType.CNG, "Low Floor", 40)),
-    FleetRange(5060, 5091, FleetSpec(2014, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 29)),
-
-    FleetRange(44000, 44039, FleetSpec(2016, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 40)),
-    FleetRange(44040, 44056, FleetSpec(2016, "GILLIG", "", PropulsionType.CNG, "Low Floor", 40)),
-    FleetRange(42000, 42000, FleetSpec(2016, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 29)),
-
-    FleetRange(44057, 44072, FleetSpec(2017, "GILLIG", "BRT Plus", PropulsionType.DIESEL, "Low Floor", 40)),
-    FleetRange(44073, 44080, FleetSpec(2017, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 40)),
-    
-    FleetRange(44081, 44118, FleetSpec(2017, "GILLIG", "", PropulsionType.CNG, "Low Floor", 40)),
-    FleetRange(44119, 44141, FleetSpec(2019, "GILLIG", "", PropulsionType.CNG, "Low Floor", 40)),
-    FleetRange(44142, 44144, FleetSpec(2019, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 40)),
-
-    FleetRange(43000, 43003, FleetSpec(2019, "Proterra", "BE-35", PropulsionType.BATTERY_ELECTRIC, "Catalyst", 35)),
-
-    FleetRange(44145, 44153, FleetSpec(2020, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 40)),
-    FleetRange(42001, 42039, FleetSpec(2020, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 29)),
-
-    FleetRange(46000, 46015, FleetSpec(2019, "Nova Bus", "Artic", PropulsionType.DIESEL, "LFS", 60)),
-
-    FleetRange(44154, 44163, FleetSpec(2022, "GILLIG", "Plus EV", PropulsionType.BATTERY_ELECTRIC, "Low Floor", 40)),
-    FleetRange(44164, 44175, FleetSpec(2024, "GILLIG", "Plus EV", PropulsionType.BATTERY_ELECTRIC, "Low Floor", 40)),
-    FleetRange(44176, 44235, FleetSpec(2025, "GILLIG", "Plus EV", PropulsionType.BATTERY_ELECTRIC, "Low Floor", 40)),
-]
-
-ART = [
-    # NABI 40-LFW Gen III CNG (note: two disjoint groups)
-    FleetRange(5054, 5059, FleetSpec(2014, "NABI", "Gen III", PropulsionType.CNG, "LFW", 40)),
-    FleetRange(5061, 5061, FleetSpec(2014, "NABI", "Gen III", PropulsionType.CNG, "LFW", 40)),
-    FleetRange(5067, 5067, FleetSpec(2014, "NABI", "Gen III", PropulsionType.CNG, "LFW", 40)),
-    FleetRange(5092, 5099, FleetSpec(2015, "NABI", "Gen III", PropulsionType.CNG, "LFW", 40)),
-
-    # New Flyer XN40 (disjoint set -> split into contiguous ranges + singles)
-    FleetRange(5281, 5281, FleetSpec(2017, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(5283, 5283, FleetSpec(2017, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(5285, 5285, FleetSpec(2017, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(5287, 5287, FleetSpec(2017, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(5289, 5289, FleetSpec(2017, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(5291, 5291, FleetSpec(2017, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-    FleetRange(5293, 5299, FleetSpec(2017, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-
-    # New Flyer XN35
-    FleetRange(5300, 5313, FleetSpec(2019, "New Flyer", "XN35", PropulsionType.CNG, "Xcelsior®", 35)),
-    
-    # New Flyer XN40 (2022)
-    FleetRange(5400, 5419, FleetSpec(2022, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)),
-
-    # GILLIG Low Floor 35ft CNG
-    FleetRange(5314, 5328, FleetSpec(2024, "GILLIG", "", PropulsionType.CNG, "Low Floor", 35)),
-
-    # GILLIG Low Floor Plus 35ft EV
-    FleetRange(5329, 5329, FleetSpec(2025, "GILLIG", "Plus EV", PropulsionType.BATTERY_ELECTRIC, "Low Floor", 35)),
-
-    # GILLIG Low Floor Plus 40ft EV
-    FleetRange(5420, 5422, FleetSpec(2025, "GILLIG", "Plus EV", PropulsionType.BATTERY_ELECTRIC, "Low Floor", 40)),
-]
-
-NYCTA = [
-    # Diesel-electric hybrid
-    FleetRange(4343, 4702, FleetSpec(2009, "Orion", "07.501 HEV", PropulsionType.DIESEL_ELECTRIC, "Orion VII", 40)), # verified 
-    FleetRange(9500, 9509, FleetSpec(2018, "New Flyer", "XDE40", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 40)), # verified
-    FleetRange(9416, 9499, FleetSpec(2021, "New Flyer", "XDE40", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 40)), # verified
-    FleetRange(9510, 9619, FleetSpec(2022, "New Flyer", "XDE40", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 40)), # verified
-    FleetRange(9620, 9910, FleetSpec(2021, "Nova Bus", "HEV", PropulsionType.DIESEL_ELECTRIC, "LFS", 40)), # verified
-
-    # Diesel
-    FleetRange(1202, 1289, FleetSpec(2010, "Nova Bus", "Artic (1st Generation)", PropulsionType.DIESEL, "LFS", 62)), # verified
-    FleetRange(8000, 8089, FleetSpec(2011, "Nova Bus", "Diesel (3rd Generation)", PropulsionType.DIESEL, "LFS", 40)), # verified
-    FleetRange(4710, 4799, FleetSpec(2012, "New Flyer", "XD60", PropulsionType.DIESEL, "Xcelsior®", 60)), # verified
-
-    FleetRange(7000, 7089, FleetSpec(2011, "Orion", "07.501 (3rd Generation)", PropulsionType.DIESEL, "Orion VII", 40)), # verified
-    FleetRange(4810, 4899, FleetSpec(2011, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)), # verified
-
-    FleetRange(5252, 5298, FleetSpec(2011, "Nova Bus", "Artic (1st Generation)", PropulsionType.DIESEL, "LFS", 62)), # verified
-    FleetRange(5300, 5363, FleetSpec(2012, "Nova Bus", "Artic (1st Generation)", PropulsionType.DIESEL, "LFS", 62)), # verified
-    FleetRange(5770, 5986, FleetSpec(2013, "Nova Bus", "Artic (1st Generation)", PropulsionType.DIESEL, "LFS", 62)), # verified
-
-    FleetRange(7090, 7483, FleetSpec(2014, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)), # verified
-    FleetRange(8090, 8503, FleetSpec(2015, "Nova Bus", "Diesel (4th Generation)", PropulsionType.DIESEL, "LFS", 40)), # verified
-    FleetRange(5364, 5438, FleetSpec(2016, "New Flyer", "XD60", PropulsionType.DIESEL, "Xcelsior®", 60)), # verified
-    FleetRange(5987, 6125, FleetSpec(2017, "New Flyer", "XD60", PropulsionType.DIESEL, "Xcelsior®", 60)), # verified
-    FleetRange(5439, 5602, FleetSpec(2017, "Nova Bus", "Artic (2nd Generation)", PropulsionType.DIESEL, "LFS", 62)), # verified
-    FleetRange(7484, 7850, FleetSpec(2018, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)), # verified
-    FleetRange(8504, 8754, FleetSpec(2019, "Nova Bus", "Diesel (4th Generation)", PropulsionType.DIESEL, "LFS", 40)), # verified
-    FleetRange(6126, 6286, FleetSpec(2019, "New Flyer", "XD60", PropulsionType.DIESEL, "Xcelsior®", 60)), # verified
-    FleetRange(8755, 8963, FleetSpec(2021, "Nova Bus", "Diesel (4th Generation)", PropulsionType.DIESEL, "LFS", 40)), # verified
-    FleetRange(7851, 7989, FleetSpec(2021, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)), # verified
-    FleetRange(9272, 9387, FleetSpec(2023, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)), # verified
-    FleetRange(8964, 9271, FleetSpec(2023, "Nova Bus", "Diesel (4th Generation)", PropulsionType.DIESEL, "LFS", 40)), # verified
-    FleetRange(6287, 6510, FleetSpec(2025, "New Flyer", "XD60", PropulsionType.DIESEL, "Xcelsior®", 60)), # verified
-
-    # CNG
-    FleetRange(185, 672, FleetSpec(2011, "New Flyer", "C40LF", PropulsionType.CNG, "Low Floor", 40)), # verified
-    FleetRange(673, 810, FleetSpec(2017, "New Flyer", "XN40", PropulsionType.CNG, "Xcelsior®", 40)), # verified
-    FleetRange(1000, 1109, FleetSpec(2017, "New Flyer", "XN60", PropulsionType.CNG, "Xcelsior®", 60)), # verified
-
-    # Battery electric
-    FleetRange(4950, 4964, FleetSpec(2019, "New Flyer", "XE60", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 60)), # verified
-    FleetRange(4965, 5024, FleetSpec(2024, "New Flyer", "XE40", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 40)), # verified
-    FleetRange(5030, 5216, FleetSpec(2026, "New Flyer", "XE40", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 40)), # verified
-    FleetRange(5025, 5029, FleetSpec(2025, "Nova Bus", "LFSe+", PropulsionType.BATTERY_ELECTRIC, "LFS", 40, display_name="2025 Nova Bus LFSe+")), # verified
-    FleetRange(5603, 5620, FleetSpec(2025, "New Flyer", "XE60", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 60)), # verified
-
-    # Hydrogen fuel cell
-    FleetRange(5217, 5218, FleetSpec(2025, "New Flyer", "XHE40", PropulsionType.HYDROGEN_FUEL_CELL, "Xcelsior CHARGE H2", 40)), # verified
-]
-
-NYCTA_EXPRESS_BUS = [
-    FleetRange(3000, 3474, FleetSpec(2004, "Motor Coach Industries", "D4500CL", PropulsionType.DIESEL, "D-Series", 45)), # verified
-    FleetRange(4306, 4306, FleetSpec(2004, "Motor Coach Industries", "D4500CL", PropulsionType.DIESEL, "D-Series", 45)), # verified
-    FleetRange(2195, 2250, FleetSpec(2008, "Motor Coach Industries", "D4500CT", PropulsionType.DIESEL, "D-Series", 45)), # verified
-    FleetRange(2400, 2489, FleetSpec(2011, "Prevost", "X3-45 Commuter (1st Generation)", PropulsionType.DIESEL, "X-Series", 45)), # verified
-    FleetRange(2251, 2303, FleetSpec(2012, "Motor Coach Industries", "D4500CT", PropulsionType.DIESEL, "D-Series", 45)), # verified
-    FleetRange(2490, 2789, FleetSpec(2014, "Prevost", "X3-45 Commuter (1st Generation)", PropulsionType.DIESEL, "X-Series", 45)), # verified
-    FleetRange(1300, 1629, FleetSpec(2021, "Prevost", "X3-45 Commuter (2nd Generation)", PropulsionType.DIESEL, "X-Series", 45)), # verified
-    FleetRange(1630, 2010, FleetSpec(2025, "Prevost", "X3-45 Commuter (2nd Generation)", PropulsionType.DIESEL, "X-Series", 45)), # verified
-]
-
-FAIRFAX_CONNECTOR = [
-    FleetRange(9770, 9795, FleetSpec(2008, "DaimlerChrysler North America", "Next Generation", PropulsionType.DIESEL, "Orion VII", 30)),
-    FleetRange(9600, 9613, FleetSpec(2009, "New Flyer", "D40LFR", PropulsionType.DIESEL, "Low Floor Restyled", 40)),
-    FleetRange(9614, 9644, FleetSpec(2010, "New Flyer", "D40LFR", PropulsionType.DIESEL, "Low Floor Restyled", 40)),
-    FleetRange(9645, 9675, FleetSpec(2011, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7701, 7737, FleetSpec(2011, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7738, 7753, FleetSpec(2012, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7755, 7758, FleetSpec(2012, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(3082, 3087, FleetSpec(2012, "Daimler Commercial Buses", "EPA10 BRT", PropulsionType.DIESEL_ELECTRIC, "Orion VII", 30)),
-    FleetRange(9676, 9690, FleetSpec(2012, "New Flyer", "XD35", PropulsionType.DIESEL, "Xcelsior®", 35)),
-    FleetRange(7759, 7777, FleetSpec(2013, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7778, 7794, FleetSpec(2014, "New Flyer", "XD35", PropulsionType.DIESEL, "Xcelsior®", 35)),
-    FleetRange(7795, 7799, FleetSpec(2015, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7800, 7811, FleetSpec(2015, "New Flyer", "XD35", PropulsionType.DIESEL, "Xcelsior®", 35)),
-    FleetRange(1730, 1739, FleetSpec(2017, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7812, 7815, FleetSpec(2018, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7816, 7825, FleetSpec(2018, "New Flyer", "XD35", PropulsionType.DIESEL, "Xcelsior®", 35)),
-    FleetRange(7826, 7829, FleetSpec(2019, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7830, 7840, FleetSpec(2020, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7841, 7868, FleetSpec(2021, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7869, 7876, FleetSpec(2022, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7877, 7892, FleetSpec(2022, "New Flyer", "XD35", PropulsionType.DIESEL, "Xcelsior®", 35)),
-    FleetRange(1000, 1007, FleetSpec(2022, "New Flyer", "XE40", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 40)),
-    FleetRange(7893, 7904, FleetSpec(2023, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(1008, 1009, FleetSpec(2023, "New Flyer", "XE40", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 40)),
-    FleetRange(1010, 1011, FleetSpec(2023, "New Flyer", "XE35", PropulsionType.BATTERY_ELECTRIC, "Xcelsior CHARGE NG", 35)),
-    FleetRange(7905, 7950, FleetSpec(2024, "New Flyer", "XD40", PropulsionType.DIESEL, "Xcelsior®", 40)),
-    FleetRange(7951, 7960, FleetSpec(2024, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 29)),
-    FleetRange(7961, 7972, FleetSpec(2025, "GILLIG", "", PropulsionType.DIESEL, "Low Floor", 29)),
-    FleetRange(3000, 3011, FleetSpec(2025, "New Flyer", "XDE40", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 40)),
-    FleetRange(3012, 3059, FleetSpec(2026, "New Flyer", "XDE35", PropulsionType.DIESEL_ELECTRIC, "Xcelsior®", 35)),
-    FleetRange(1012, 1013, FleetSpec(2025, "GILLIG", "Plus EV", PropulsionType.BATTERY_ELECTRIC, "Low Floor", 40)),
-]
-    
-    
-
-AGENCY_FLEETS: dict[str, AgencyFleet] = {
-    "WMATA": AgencyFleet("WMATA", "Metrobus (WMATA)", WMATA),
-    "RIDEON": AgencyFleet("RIDEON", "Ride On (MCDOT)", RIDEON),
-    "ART": AgencyFleet("ART", "Arlington Transit (ART)", ART),
-    "FAIRFAX_CONNECTOR": AgencyFleet("FAIRFAX_CONNECTOR", "Fairfax Connector", FAIRFAX_CONNECTOR),
-    "NYCTA": AgencyFleet("NYCTA", "New York City Transit Authority (NYCTA)", NYCTA),
-    "NYCTA_EXPRESS": AgencyFleet("NYCTA_EXPRESS", "NYCTA Express Bus", NYCTA_EXPRESS_BUS),
-}
+LANDING_TEMPLATE_PATH = os.path.join("templates", "index.html")
 
 
 def _coerce_bus_id(bus_id: BusID) -> int:
     try:
-        return int(bus_id)
-    except (TypeError, ValueError) as exc:
-        raise ValueError("Bus ID must be numeric.") from exc
+        return bus_id_key(bus_id)
+    except ValueError as exc:
+        raise ValueError("Bus ID is not a valid fleet number.") from exc
+
+
+def _day(as_of: date | None) -> int:
+    return today() if as_of is None else as_of.toordinal()
 
 
-def find_spec(bus_id: BusID, ranges: list[FleetRange]) -> FleetSpec | None:
-    numeric_bus_id = _coerce_bus_id(bus_id)
+@_timed("find_spec")
+def find_spec(
+    bus_id: BusID, ranges: FleetIndex | Sequence[FleetRange], as_of: date | None = None
+) -> FleetSpec | None:
+    key = _coerce_bus_id(bus_id)
+    day = _day(as_of)
+    if isinstance(ranges, FleetIndex):
+        match = ranges.lookup(key, day)
+        return match.spec if match else None
     for r in ranges:
-        if r.lo <= numeric_bus_id <= r.hi:
+        first, last = r.service_days
+        if fleet_number_key(r.lo) <= key <= fleet_number_key(r.hi) and first <= day < last:
             return r.spec
     return None
 
-def find_suggested_agencies(bus_id: BusID, requested_agency: str) -> list[AgencyFleet]:
-    numeric_bus_id = _coerce_bus_id(bus_id)
-    matches: list[AgencyFleet] = []
-    for key, agency in AGENCY_FLEETS.items():
-        if key == requested_agency:
-            continue
-        for r in agency.ranges:
-            if r.lo <= numeric_bus_id <= r.hi:
-                matches.append(agency)
-                break
-    return matches
+def find_matches(bus_id: BusID, as_of: date | None = None) -> tuple[FleetMatch, ...]:
+    """Return every ``(agency, range)`` covering ``bus_id`` on ``as_of`` (default today), in ``AGENCY_FLEETS`` order."""
+    return current_snapshot().coverage.lookup(_coerce_bus_id(bus_id), _day(as_of))
+
+
+@_timed("find_suggested_agencies")
+def find_suggested_agencies(bus_id: BusID, requested_agency: str, as_of: date | None = None) -> list[AgencyFleet]:
+    return [agency for agency, _ in find_matches(bus_id, as_of) if agency.key != requested_agency]
 
 
 def spec_to_dict(spec: FleetSpec) -> dict[str, int | str | None]:
@@ -317,6 +296,630 @@ def spec_to_dict(spec: FleetSpec) -> dict[str, int | str | None]:
     }
 
 
+def service_to_dict(fleet_range: FleetRange) -> dict[str, str | None]:
+    """The range's service dates as ISO strings; empty for an undated range, so its payloads stay as they were."""
+    if fleet_range.in_service is None and fleet_range.retired is None:
+        return {}
+    return {
+        "in_service": None if fleet_range.in_service is None else fleet_range.in_service.isoformat(),
+        "retired": None if fleet_range.retired is None else fleet_range.retired.isoformat(),
+    }
+
+
+def _agency_ref(agency: AgencyFleet) -> dict[str, str]:
+    return {"key": agency.key, "display_name": agency.display_name}
+
+
+def resolve_lookup(agency_fleet: AgencyFleet, matches: tuple[FleetMatch, ...]) -> tuple[int, Any]:
+    """Turn the matches for one bus ID into ``(status_code, body)`` for ``agency_fleet``.
+
+    For a hit the body is the response payload; otherwise it is the error detail.
+    """
+    match: FleetRange | None = None
+    other_agencies: list[AgencyFleet] = []
+    for matched_agency, matched_range in matches:
+        if matched_agency is agency_fleet:
+            match = matched_range
+        else:
+            other_agencies.append(matched_agency)
+
+    if match is None:
+        if other_agencies:
+            suggestions_payload = [_agency_ref(suggested) for suggested in other_agencies]
+            return 404, {
+                "message": f"Bus not found in {agency_fleet.display_name}.",
+                "requested_agency": agency_fleet.key,
+                "suggested_agencies": suggestions_payload,
+                "suggested_agency": suggestions_payload[0]["key"],
+                "suggested_agency_name": suggestions_payload[0]["display_name"],
+            }
+        return 404, "Bus not found in fleet."
+
+    response: dict[str, Any] = {"spec": spec_to_dict(match.spec), **service_to_dict(match)}
+    if other_agencies:
+        response["also_found_in"] = [_agency_ref(a) for a in other_agencies]
+    return 200, response
+
+
+@_timed("serialize")
+def _render_json(content: Any) -> bytes:
+    """Encode ``content`` exactly as FastAPI's ``JSONResponse`` would."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+_DIGEST_SIZE = 16
+
+
+def _body_digest(body: bytes) -> bytes:
+    return hashlib.blake2b(body, digest_size=_DIGEST_SIZE).digest()
+
+
+class CachedResponse:
+    """One pre-encoded ``/api/fleet`` body with its strong ETag."""
+
+    __slots__ = ("status_code", "body", "etag", "headers", "outcome")
+
+    def __init__(self, status_code: int, body: bytes, version: int, outcome: str, digest: bytes | None = None) -> None:
+        self.status_code = status_code
+        self.body = body
+        self.outcome = outcome
+        self.etag = f'"{(digest or _body_digest(body)).hex()}"'
+        self.headers = {"ETag": self.etag, "Cache-Control": API_CACHE_CONTROL, "X-Fleet-Version": str(version)}
+
+    def respond(self, if_none_match: str | None = None) -> Response:
+        # RFC 9110 13.2.1: conditions are ignored when the response would not be 2xx.
+        if if_none_match and self.status_code == 200:
+            matched = _etag_matches(if_none_match, self.etag)
+            if METRICS_ENABLED:
+                CONDITIONAL_REQUESTS.inc(("not_modified" if matched else "modified",))
+            if matched:
+                return Response(status_code=304, headers=self.headers)
+        return Response(self.body, status_code=self.status_code, headers=self.headers, media_type="application/json")
+
+
+_MISS_BODY = _render_json({"detail": "Bus not found in fleet."})
+_OUTCOMES = ("hit", "miss", "suggestion")
+
+
+class ResponseCache:
+    """Pre-rendered ``/api/fleet`` responses keyed by agency and coverage ordinal.
+
+    Every hit body is rendered up front. Miss bodies depend on which agency was
+    asked for, so there can be one per agency per coverage; those are rendered
+    on first use and kept.
+
+    Bodies are spliced from JSON fragments encoded once per spec and per
+    agency, byte for byte what ``_render_json(resolve_lookup(...))`` returns.
+    Distinct up-front bodies are stored once, back to back in one buffer with
+    their digests, status codes and outcomes in parallel arrays. A
+    ``CachedResponse`` is made from them on first use. Pickled, the buffers go
+    out of band, so a cache loaded with ``load_store_objects`` serves bodies
+    straight from the mapped file.
+    """
+
+    __slots__ = (
+        "_coverage",
+        "_version",
+        "_agency_json",
+        "_rendered",
+        "_responses",
+        "_late",
+        "_bodies",
+        "_offsets",
+        "_digests",
+        "_statuses",
+        "_outcomes",
+    )
+
+    def __init__(self, fleets: Iterable[AgencyFleet], coverage: CoverageIndex, version: int = 0) -> None:
+        self._coverage = coverage
+        self._version = version
+        # Per agency: its reference object, key, display name and miss message, each JSON-encoded.
+        self._agency_json: dict[str, tuple[bytes, bytes, bytes, bytes]] = {}
+        # (agency key, ordinal) -> index into ``_responses``, for up-front bodies;
+        # responses rendered on first use go in ``_late`` instead.
+        self._rendered: dict[tuple[str, int], int] = {}
+        self._late: dict[tuple[str, int], CachedResponse] = {}
+
+        bodies = bytearray()
+        offsets = array("q", [0])
+        digests = bytearray()
+        statuses = array("H")
+        outcomes = array("B")
+        numbers: dict[bytes, int] = {}
+        spec_json: dict[FleetSpec, bytes] = {}
+
+        def add(agency: AgencyFleet, ordinal: int) -> None:
+            status_code, encoded, outcome = self._encode(agency, ordinal, spec_json)
+            digest = _body_digest(encoded)
+            number = numbers.get(digest)
+            if number is None:
+                number = numbers[digest] = len(statuses)
+                bodies.extend(encoded)
+                offsets.append(len(bodies))
+                digests.extend(digest)
+                statuses.append(status_code)
+                outcomes.append(_OUTCOMES.index(outcome))
+            self._rendered[agency.key, ordinal] = number
+
+        for agency in fleets:
+            add(agency, 0)
+        for ordinal, covering in enumerate(coverage.coverings()):
+            for agency, _ in covering:
+                add(agency, ordinal)
+        self._bodies: bytes | memoryview = bytes(bodies)
+        self._digests: bytes | memoryview = bytes(digests)
+        self._offsets = offsets
+        self._statuses = statuses
+        self._outcomes = outcomes
+        self._responses: list[CachedResponse | None] = [None] * len(statuses)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            "coverage": self._coverage,
+            "version": self._version,
+            "agency_json": self._agency_json,
+            "rendered": self._rendered,
+            "bodies": pickle.PickleBuffer(self._bodies),
+            "offsets": self._offsets,
+            "digests": pickle.PickleBuffer(self._digests),
+            "statuses": self._statuses,
+            "outcomes": self._outcomes,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, f"_{name}", value)
+        self._responses = [None] * len(self._statuses)
+        self._late = {}
+
+    def _fragments(self, agency_fleet: AgencyFleet) -> tuple[bytes, bytes, bytes, bytes]:
+        fragments = self._agency_json.get(agency_fleet.key)
+        if fragments is None:
+            fragments = self._agency_json[agency_fleet.key] = (
+                _render_json(_agency_ref(agency_fleet)),
+                _render_json(agency_fleet.key),
+                _render_json(agency_fleet.display_name),
+                _render_json(f"Bus not found in {agency_fleet.display_name}."),
+            )
+        return fragments
+
+    def _encode(self, agency_fleet: AgencyFleet, ordinal: int, spec_json: dict[FleetSpec, bytes]) -> tuple[int, bytes, str]:
+        match: FleetRange | None = None
+        other_agencies: list[AgencyFleet] = []
+        for matched_agency, matched_range in self._coverage.coverings()[ordinal]:
+            if matched_agency is agency_fleet:
+                match = matched_range
+            else:
+                other_agencies.append(matched_agency)
+        refs = b",".join(self._fragments(other)[0] for other in other_agencies)
+
+        if match is not None:
+            body = spec_json.get(match.spec)
+            if body is None:
+                body = spec_json[match.spec] = _render_json(spec_to_dict(match.spec))
+            body = b'{"spec":' + body
+            service = service_to_dict(match)
+            if service:
+                body += b"," + _render_json(service)[1:-1]
+            if other_agencies:
+                body += b',"also_found_in":[' + refs + b"]"
+            return 200, body + b"}", "hit"
+        if not other_agencies:
+            return 404, _MISS_BODY, "miss"
+        _, key, _, message = self._fragments(agency_fleet)
+        _, first_key, first_name, _ = self._fragments(other_agencies[0])
+        body = (
+            b'{"detail":{"message":' + message + b',"requested_agency":' + key
+            + b',"suggested_agencies":[' + refs + b'],"suggested_agency":' + first_key
+            + b',"suggested_agency_name":' + first_name + b"}}"
+        )
+        return 404, body, "suggestion"
+
+    def _response(self, number: int) -> CachedResponse:
+        cached = self._responses[number]
+        if cached is None:
+            start, end = self._offsets[number], self._offsets[number + 1]
+            cached = self._responses[number] = CachedResponse(
+                self._statuses[number],
+                bytes(self._bodies[start:end]),
+                self._version,
+                _OUTCOMES[self._outcomes[number]],
+                bytes(self._digests[number * _DIGEST_SIZE : (number + 1) * _DIGEST_SIZE]),
+            )
+        return cached
+
+    def get(self, agency_fleet: AgencyFleet, bus_id: int, day: int | None = None) -> CachedResponse:
+        """The response for ``bus_id`` in ``agency_fleet`` on ``day``, a date ordinal defaulting to today."""
+        key = (agency_fleet.key, self._coverage.locate(bus_id, day))
+        number = self._rendered.get(key)
+        if number is not None:
+            if METRICS_ENABLED:
+                RESPONSE_CACHE_LOOKUPS.inc(("hit",))
+            return self._response(number)
+        cached = self._late.get(key)
+        if METRICS_ENABLED:
+            RESPONSE_CACHE_LOOKUPS.inc(("hit" if cached is not None else "render",))
+        if cached is None:
+            # Only hits need spec fragments, and every hit was rendered up front.
+            status_code, encoded, outcome = self._encode(agency_fleet, key[1], {})
+            cached = self._late.setdefault(key, CachedResponse(status_code, encoded, self._version, outcome))
+        return cached
+
+    def restamp(self, version: int) -> None:
+        """Label every response with snapshot ``version``, for a cache loaded from disk."""
+        if version != self._version:
+            self._version = version
+            for cached in (*self._responses, *self._late.values()):
+                if cached is not None:
+                    cached.headers["X-Fleet-Version"] = str(version)
+
+    def __len__(self) -> int:
+        return len(self._responses) + len(self._late)
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip() in {"gzip", "*"}:
+            quality = params.replace(" ", "").removeprefix("q=")
+            return not quality or quality.strip("0.") != ""
+    return False
+
+
+def _not_modified_since(if_modified_since: str, last_modified: int) -> bool:
+    try:
+        return int(parsedate_to_datetime(if_modified_since).timestamp()) >= last_modified
+    except (TypeError, ValueError):
+        return False
+
+
+class PrerenderedPage:
+    """An HTML page rendered once and held as bytes, with a gzip copy and validators.
+
+    Serving it is a header check and a bytes write, the same work as a static
+    file. Identity and gzip bodies are separate representations, so each gets
+    its own strong ETag.
+    """
+
+    __slots__ = ("body", "gzip_body", "etag", "gzip_etag", "last_modified", "headers")
+
+    def __init__(self, body: bytes, last_modified: float) -> None:
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.gzip_etag = f'"{hashlib.blake2b(self.gzip_body, digest_size=16).hexdigest()}"'
+        self.last_modified = int(last_modified)
+        self.headers = {
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            "Cache-Control": LANDING_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+
+    def respond(self, request: Request) -> Response:
+        if _accepts_gzip(request.headers.get("accept-encoding", "")):
+            body, headers = self.gzip_body, {**self.headers, "ETag": self.gzip_etag, "Content-Encoding": "gzip"}
+        else:
+            body, headers = self.body, {**self.headers, "ETag": self.etag}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, headers["ETag"])
+        else:
+            if_modified_since = request.headers.get("if-modified-since")
+            not_modified = bool(if_modified_since) and _not_modified_since(if_modified_since, self.last_modified)
+        if not_modified:
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+        return Response(body, headers=headers, media_type="text/html")
+
+
+@functools.cache
+def _templates():
+    # Jinja2 is imported on first render; a start from the snapshot cache never needs it.
+    from fastapi.templating import Jinja2Templates
+
+    return Jinja2Templates(directory="templates")
+
+
+def render_landing_page(fleets: Mapping[str, AgencyFleet], last_modified: float) -> PrerenderedPage:
+    """Render the landing page shell. It carries no per-user data: the CSRF token goes out as a cookie."""
+    html = _templates().get_template("index.html").render(
+        agencies=[_agency_ref(agency) for agency in fleets.values()],
+        csrf_token="",
+        csrf_cookie_name=CSRF_COOKIE_NAME,
+    )
+    return PrerenderedPage(html.encode("utf-8"), last_modified)
+
+
+def _source_mtime(*paths: str) -> float:
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.path.getmtime(path))
+        except OSError:
+            pass
+    return max(mtimes, default=time.time())
+
+
+@dataclass(frozen=True)
+class FleetSnapshot:
+    """Fleet data and every structure derived from it, published as one unit.
+
+    Request handlers read ``current_snapshot()`` once and use that object
+    throughout, so a reload never mixes old and new data within a request.
+    """
+
+    version: int
+    source_digest: str
+    loaded_at: float
+    fleets: Mapping[str, AgencyFleet]
+    coverage: CoverageIndex
+    responses: ResponseCache
+    prefixes: PrefixIndex
+    landing: PrerenderedPage
+    validation: ValidationReport | None
+    daily_prefixes: dict[str | None, PrefixIndex] = field(default_factory=dict, repr=False, compare=False)
+    daily_stats: dict[int, FleetStats] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def stats(self) -> FleetStats:
+        """Columnar view of the ranges in service today for ``/api/fleet/stats``, built on first use each day."""
+        day = today()
+        stats = self.daily_stats.get(day)
+        if stats is None:
+            stats = FleetStats(self.fleets.values(), day)
+            self.daily_stats.clear()
+            stats = self.daily_stats.setdefault(day, stats)
+        return stats
+
+    def prefixes_for(self, agency_fleet: AgencyFleet | None = None) -> PrefixIndex:
+        """Typeahead index over the ranges in service today, across agencies or for one.
+
+        A per-agency index is built the first time that agency is filtered on.
+        Any index is rebuilt once today falls outside the days it covers.
+        """
+        day = today()
+        key = None if agency_fleet is None else agency_fleet.key
+        index = self.daily_prefixes.get(key, self.prefixes if key is None else None)
+        if index is None or not index.covers(day):
+            fleets = self.fleets.values() if agency_fleet is None else (agency_fleet,)
+            index = PrefixIndex(fleets, cap=2 * SUGGEST_MAX_RESULTS, day=day)
+            self.daily_prefixes[key] = index
+        return index
+
+    def warm(self) -> None:
+        """Decode every range and build today's stats columns and typeahead index now rather than on first use.
+
+        Called before forking workers, so they share these objects instead of
+        each building a private copy.
+        """
+        for fleet in self.fleets.values():
+            for _ in fleet.ranges:
+                pass
+        self.stats.group_counts(("agency",))
+        self.prefixes_for()
+
+
+def check_fleet_data(fleets: Mapping[str, AgencyFleet]) -> ValidationReport | None:
+    """Validate loaded fleets as FLEET_DATA_VALIDATION says: skip, log, or reject on errors."""
+    if FLEET_DATA_VALIDATION == "off":
+        return None
+    return apply_validation(validate_fleets(fleets.values()))
+
+
+def reject_validation_errors(report: ValidationReport) -> None:
+    errors = report.errors
+    if errors:
+        first = errors[0]
+        more = f" (and {len(errors) - 1} more)" if len(errors) > 1 else ""
+        raise FleetDataError(f"Fleet data failed validation: {first.agency}: {first.message}{more}")
+
+
+def apply_validation(report: ValidationReport) -> ValidationReport:
+    """Write ``report`` to FLEET_DATA_REPORT when that is set, then log it or, in strict mode, reject errors."""
+    if FLEET_DATA_REPORT:
+        staging = f"{FLEET_DATA_REPORT}.tmp"
+        with open(staging, "w", encoding="utf-8") as fh:
+            json.dump(report.to_dict(), fh, indent=2)
+        os.replace(staging, FLEET_DATA_REPORT)
+    if FLEET_DATA_VALIDATION == "strict":
+        reject_validation_errors(report)
+    if report.errors or any(issue.severity == "warning" for issue in report.issues):
+        logger.warning("Fleet data validation: %s", report.summary())
+    else:
+        logger.info("Fleet data validation: %s", report.summary())
+    return report
+
+
+# Bump when the cached structures change shape in a way the code digest would miss.
+SNAPSHOT_CACHE_FORMAT = 1
+# The only classes the cache may load; anything else in the file rejects it.
+SNAPSHOT_CACHE_CLASSES = (
+    CoverageIndex,
+    PrefixIndex,
+    ResponseCache,
+    PrerenderedPage,
+    ValidationReport,
+    ValidationIssue,
+)
+
+
+def _snapshot_cache_key(source_digest: bytes, last_modified: float) -> bytes:
+    """Digest everything the cached structures depend on.
+
+    That is the fleet data, the code and template that build and render it,
+    and the settings baked into the responses.
+    """
+    digest = hashlib.sha256(source_digest)
+    for path in (__file__, fleetdata.__file__, fleetcheck.__file__, LANDING_TEMPLATE_PATH):
+        with open(path, "rb") as fh:
+            digest.update(fh.read())
+    settings = (
+        SNAPSHOT_CACHE_FORMAT,
+        sys.version_info[:2],
+        __name__,
+        int(last_modified),
+        API_CACHE_CONTROL,
+        LANDING_CACHE_CONTROL,
+        CSRF_COOKIE_NAME,
+        SUGGEST_MAX_RESULTS,
+        FLEET_DATA_VALIDATION,
+    )
+    digest.update(repr(settings).encode())
+    return digest.digest()
+
+
+def _load_cached_structures(fleets, key: bytes) -> dict[str, Any] | None:
+    if not FLEET_SNAPSHOT_PATH:
+        return None
+    try:
+        return load_store_objects(FLEET_SNAPSHOT_PATH, fleets, key, SNAPSHOT_CACHE_CLASSES)
+    except Exception as exc:  # a corrupt or incompatible cache is rebuilt, never fatal
+        logger.warning("Ignoring fleet snapshot cache %s: %s", FLEET_SNAPSHOT_PATH, exc)
+        return None
+
+
+def _save_cached_structures(fleets, key: bytes, structures: dict[str, Any]) -> None:
+    if not FLEET_SNAPSHOT_PATH:
+        return
+    try:
+        dump_store_objects(FLEET_SNAPSHOT_PATH, fleets, key, structures)
+    except (OSError, pickle.PicklingError, TypeError) as exc:
+        logger.warning("Could not write fleet snapshot cache %s: %s", FLEET_SNAPSHOT_PATH, exc)
+
+
+def build_snapshot(version: int) -> FleetSnapshot:
+    """Load (recompiling if the source changed), validate and index the fleet data without publishing it.
+
+    The indexes, rendered responses, landing page and validation report come
+    from the FLEET_SNAPSHOT_PATH cache when it was written for the same data,
+    code and settings; otherwise they are built and the cache is rewritten.
+    """
+    fleets = load_fleet_store(FLEET_DATA_SOURCE, FLEET_DATA_PATH)
+    if not fleets:
+        raise FleetDataError("Fleet data has no agencies.")
+    last_modified = _source_mtime(LANDING_TEMPLATE_PATH, FLEET_DATA_SOURCE)
+    key = _snapshot_cache_key(fleets.source_digest, last_modified)
+    structures = _load_cached_structures(fleets, key)
+    if structures is not None:
+        if structures["validation"] is not None:
+            apply_validation(structures["validation"])
+        structures["responses"].restamp(version)
+    else:
+        validation = check_fleet_data(fleets)
+        coverage = CoverageIndex(fleets.values())
+        structures = {
+            "coverage": coverage,
+            "responses": ResponseCache(fleets.values(), coverage, version),
+            "prefixes": PrefixIndex(fleets.values(), cap=2 * SUGGEST_MAX_RESULTS),
+            "landing": render_landing_page(fleets, last_modified),
+            "validation": validation,
+        }
+        _save_cached_structures(fleets, key, structures)
+    return FleetSnapshot(
+        version=version,
+        source_digest=fleets.source_digest.hex(),
+        loaded_at=time.time(),
+        fleets=fleets,
+        **structures,
+    )
+
+
+# Building allocates millions of long-lived objects and no reference cycles, so
+# cyclic collections in the meantime would only rescan them, repeatedly. Nothing
+# serves requests yet; live reloads leave the collector alone.
+_collecting = gc.isenabled()
+gc.disable()
+try:
+    _snapshot = build_snapshot(1)
+finally:
+    if _collecting:
+        gc.enable()
+_reload_lock = threading.Lock()
+AGENCY_FLEETS: Mapping[str, AgencyFleet] = _snapshot.fleets
+metrics.gauge("fleet_data_version", "Version of the published fleet snapshot.", lambda: _snapshot.version)
+metrics.gauge("fleet_metrics_sample_rate", "Share of requests whose phases are timed.", lambda: METRICS_SAMPLE_RATE)
+
+
+def current_snapshot() -> FleetSnapshot:
+    return _snapshot
+
+
+def reload_fleet_data() -> FleetSnapshot:
+    """Rebuild the snapshot from the fleet source and publish it atomically.
+
+    Readers are never blocked: the new snapshot is built on the side and the
+    module reference is swapped in one assignment. Requests already running
+    finish on the snapshot they started with. If the new data fails to load,
+    the error propagates and the current snapshot stays published.
+    """
+    global _snapshot, AGENCY_FLEETS
+    with _reload_lock:
+        snapshot = build_snapshot(_snapshot.version + 1)
+        _snapshot = snapshot
+        AGENCY_FLEETS = snapshot.fleets
+    logger.info("Published fleet data version %s (%s).", snapshot.version, snapshot.source_digest[:12])
+    return snapshot
+
+
+def check_fleet_source() -> None:
+    """Raise ``FleetDataError`` or ``OSError`` if a reload would reject the fleet data, without building a snapshot.
+
+    The source is parsed and, in strict mode, validated; with no source, the
+    compiled artifact must map.
+    """
+    if not os.path.exists(FLEET_DATA_SOURCE):
+        FleetStore(FLEET_DATA_PATH)
+        return
+    with open(FLEET_DATA_SOURCE, "rb") as fh:
+        fleets = parse_fleet_source(fh.read())
+    if not fleets:
+        raise FleetDataError("Fleet data has no agencies.")
+    if FLEET_DATA_VALIDATION == "strict":
+        reject_validation_errors(validate_fleets(fleets))
+
+
+def poll_fleet_source(last_seen: tuple[int, int] | None) -> tuple[tuple[int, int] | None, FleetSnapshot | None]:
+    """Reload if the fleet source changed since ``last_seen``, its ``(mtime_ns, size)``.
+
+    Returns the new ``last_seen`` and the snapshot published, if any. A failed
+    reload is logged and the current snapshot stays published.
+    """
+    try:
+        stat = os.stat(FLEET_DATA_SOURCE)
+    except OSError:
+        return last_seen, None
+    if (stat.st_mtime_ns, stat.st_size) == last_seen:
+        return last_seen, None
+    last_seen = (stat.st_mtime_ns, stat.st_size)
+    try:
+        with open(FLEET_DATA_SOURCE, "rb") as fh:
+            digest = hashlib.sha256(fh.read()).hexdigest()
+        if digest != _snapshot.source_digest:
+            return last_seen, reload_fleet_data()
+    except (OSError, FleetDataError) as exc:
+        logger.warning("Fleet data reload failed, keeping version %s: %s", _snapshot.version, exc)
+    return last_seen, None
+
+
+def _watch_fleet_source(stop: threading.Event, interval: float) -> None:
+    """Poll the fleet source and reload whenever its contents change."""
+    last_seen: tuple[int, int] | None = None
+    while not stop.wait(interval):
+        try:
+            last_seen, _ = poll_fleet_source(last_seen)
+        except Exception:
+            # An unexpected failure must not end the thread: later edits still need picking up.
+            logger.exception("Fleet data reload failed, keeping version %s.", _snapshot.version)
+
+
 def _extract_hostname(value: str | None) -> str | None:
     """Normalize hostnames from Origin/Referer style headers."""
     if not value:
@@ -329,7 +932,7 @@ def _split_env_list(value: str) -> list[str]:
     return [item.strip() for item in value.split(",") if item.strip()]
 
 
-def _load_allowed_hosts(request: Request) -> set[str]:
+def _configured_hosts() -> frozenset[str]:
     hosts: set[str] = set()
     for entry in _split_env_list(os.getenv("ALLOWED_ORIGINS", "")):
         host = _extract_hostname(entry)
@@ -338,12 +941,53 @@ def _load_allowed_hosts(request: Request) -> set[str]:
     domain = _extract_hostname(os.getenv("ALLOWED_DOMAIN"))
     if domain:
         hosts.add(domain)
-    if not hosts and request.url.hostname:
-        hosts.add(request.url.hostname)
-    return hosts
+    return frozenset(hosts)
+
+
+# ALLOWED_ORIGINS / ALLOWED_DOMAIN are read once; changing them needs a restart.
+_CONFIGURED_HOSTS = _configured_hosts()
+
+
+def _load_allowed_hosts(request: Request) -> frozenset[str]:
+    if _CONFIGURED_HOSTS:
+        return _CONFIGURED_HOSTS
+    return frozenset((request.url.hostname,)) if request.url.hostname else frozenset()
+
+
+# Stateless CSRF tokens are "<issued hex>.<nonce>.<signature>", signed with a key
+# derived from SESSION_SECRET. The keyed HMAC state is built once and copied per use.
+_CSRF_SIGNER = hmac.new(
+    hmac.new(SESSION_SECRET.encode(), b"stateless-csrf", hashlib.sha256).digest(), digestmod=hashlib.sha256
+)
+
+
+def _sign_csrf_payload(payload: str) -> str:
+    mac = _CSRF_SIGNER.copy()
+    mac.update(payload.encode())
+    return base64.urlsafe_b64encode(mac.digest()).rstrip(b"=").decode()
+
+
+def issue_csrf_token() -> str:
+    payload = f"{int(time.time()):x}.{secrets.token_urlsafe(16)}"
+    return f"{payload}.{_sign_csrf_payload(payload)}"
+
+
+def _csrf_token_is_valid(token: str) -> bool:
+    payload, _, signature = token.rpartition(".")
+    issued, _, nonce = payload.partition(".")
+    try:
+        age = time.time() - int(issued, 16)
+    except ValueError:
+        return False
+    if not nonce or not -60 <= age <= CSRF_TOKEN_MAX_AGE:
+        return False
+    return secrets.compare_digest(signature, _sign_csrf_payload(payload))
 
 
 def _get_csrf_token(request: Request) -> str:
+    if CSRF_MODE == "stateless":
+        token = request.cookies.get(CSRF_COOKIE_NAME)
+        return token if token and _csrf_token_is_valid(token) else issue_csrf_token()
     token = request.session.get(CSRF_SESSION_KEY)
     if not token:
         token = secrets.token_urlsafe(32)
@@ -351,6 +995,7 @@ def _get_csrf_token(request: Request) -> str:
     return token
 
 
+@_timed("verify_request")
 def verify_request(request: Request) -> None:
     """Enforce a CSRF token and same-domain origin for API calls."""
     allowed_hosts = _load_allowed_hosts(request)
@@ -372,6 +1017,19 @@ def verify_request(request: Request) -> None:
     auth_header = request.headers.get("authorization") or ""
     bearer_token = auth_header[7:].strip() if auth_header.lower().startswith("bearer ") else None
     token = header_token or bearer_token
+
+    if CSRF_MODE == "stateless":
+        # Double submit: the header must echo the signed cookie set by the landing page.
+        expected_token = request.cookies.get(CSRF_COOKIE_NAME)
+        if (
+            not token
+            or not expected_token
+            or not secrets.compare_digest(token, expected_token)
+            or not _csrf_token_is_valid(token)
+        ):
+            raise HTTPException(status_code=401, detail="Unauthorized request.")
+        return
+
     expected_token = request.session.get(CSRF_SESSION_KEY)
 
     if not token or not expected_token or not secrets.compare_digest(token, expected_token):
@@ -380,61 +1038,291 @@ def verify_request(request: Request) -> None:
 
 @app.get("/api/fleet")
 def get_fleet_spec(
+    request: Request,
     agency: str = Query(..., description="Transit agency identifier, e.g. WMATA."),
     bus_id: str = Query(..., alias="busId", description="Fleet number to look up."),
+    as_of: date | None = Query(None, alias="asOf", description="Day to look the bus up on; defaults to today."),
     _: None = Depends(verify_request),
-) -> dict[str, Any]:
+) -> Response:
+    snapshot = current_snapshot()
     agency_key = agency.strip().upper()
-    agency_fleet = AGENCY_FLEETS.get(agency_key)
+    agency_fleet = snapshot.fleets.get(agency_key)
     if agency_fleet is None:
+        if METRICS_ENABLED:
+            LOOKUPS.inc(("", "unknown_agency"))
         raise HTTPException(status_code=404, detail="Agency not found.")
 
     try:
-        spec = find_spec(bus_id, agency_fleet.ranges)
+        with _phase("lookup"):
+            cached = snapshot.responses.get(agency_fleet, _coerce_bus_id(bus_id), _day(as_of))
     except ValueError as exc:
+        if METRICS_ENABLED:
+            LOOKUPS.inc((agency_fleet.key, "invalid"))
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    if spec is None:
-        suggested_agencies = find_suggested_agencies(bus_id, agency_key)
-        if suggested_agencies:
-            suggestions_payload = [
-                {"key": suggested.key, "display_name": suggested.display_name} for suggested in suggested_agencies
-            ]
-            raise HTTPException(
-                status_code=404,
-                detail={
-                    "message": f"Bus not found in {agency_fleet.display_name}.",
-                    "requested_agency": agency_key,
-                    "suggested_agencies": suggestions_payload,
-                    "suggested_agency": suggestions_payload[0]["key"],
-                    "suggested_agency_name": suggestions_payload[0]["display_name"],
-                },
-            )
-        raise HTTPException(status_code=404, detail="Bus not found in fleet.")
+    if METRICS_ENABLED:
+        LOOKUPS.inc((agency_fleet.key, cached.outcome))
+    return cached.respond(request.headers.get("if-none-match"))
 
-    other_agencies = find_suggested_agencies(bus_id, agency_key)
-    response = {"spec": spec_to_dict(spec)}
-    if other_agencies:
-        response["also_found_in"] = [{"key": a.key, "display_name": a.display_name} for a in other_agencies]
 
-    return response
+@app.get("/api/fleet/suggest")
+def get_fleet_suggestions(
+    q: str = Query(..., description="Leading digits of a fleet number."),
+    agency: str | None = Query(None, description="Only suggest ranges from this agency."),
+    limit: int = Query(10, ge=1, description="Maximum number of suggestions."),
+    _: None = Depends(verify_request),
+) -> dict[str, Any]:
+    """Typeahead: ranges in service today, across agencies, holding fleet numbers that start with ``q``.
+
+    Retired and not yet delivered ranges are left out, so every suggestion
+    resolves on ``/api/fleet``. Dated ranges carry their service dates.
+    """
+    snapshot = current_snapshot()
+    prefix = q.strip()
+    if not prefix.isdigit() or not prefix.isascii():
+        raise HTTPException(status_code=400, detail="Query must be numeric.")
+
+    agency_fleet = None
+    if agency is not None:
+        agency_fleet = snapshot.fleets.get(agency.strip().upper())
+        if agency_fleet is None:
+            raise HTTPException(status_code=404, detail="Agency not found.")
+    index = snapshot.prefixes_for(agency_fleet)
+
+    value = int(prefix)
+    results = []
+    for length, _, _, _, matched_agency, matched_range in index.search(prefix, min(limit, SUGGEST_MAX_RESULTS)):
+        results.append(
+            {
+                "agency": matched_agency.key,
+                "display_name": matched_agency.display_name,
+                "lo": matched_range.lo,
+                "hi": matched_range.hi,
+                "first_match": max(int(matched_range.lo), value * 10 ** (length - len(prefix))),
+                "exact": length == len(prefix),
+                "spec": spec_to_dict(matched_range.spec),
+                **service_to_dict(matched_range),
+            }
+        )
+    return {"query": prefix, "results": results}
+
+
+def _parse_propulsion_type(value: str) -> PropulsionType:
+    normalized = value.strip().replace("_", " ").casefold()
+    for propulsion_type in PropulsionType:
+        if normalized in (propulsion_type.value.casefold(), propulsion_type.name.replace("_", " ").casefold()):
+            return propulsion_type
+    raise HTTPException(status_code=400, detail=f"Unknown propulsion type: {value}.")
+
+
+@app.get("/api/fleet/stats")
+def get_fleet_stats(
+    by: list[str] = Query(["agency"], description=f"Dimensions to group by: {', '.join(STATS_DIMENSIONS)}."),
+    agency: list[str] = Query([], description="Only count these agencies."),
+    propulsion_type: list[str] = Query([], description="Only count these propulsion types."),
+    year_from: int | None = Query(None, alias="yearFrom", description="Earliest model year, inclusive."),
+    year_to: int | None = Query(None, alias="yearTo", description="Latest model year, inclusive."),
+    _: None = Depends(verify_request),
+) -> dict[str, Any]:
+    """Fleet composition: bus counts grouped by agency, propulsion type, year, length or make.
+
+    ``agency`` and ``propulsion_type`` filter on the dimensions of the same
+    name and may be repeated; ``yearFrom`` and ``yearTo`` bound the model year.
+    """
+    snapshot = current_snapshot()
+    dimensions = [dimension.strip().lower() for dimension in by]
+    unknown = [dimension for dimension in dimensions if dimension not in STATS_DIMENSIONS]
+    if unknown or len(set(dimensions)) != len(dimensions):
+        raise HTTPException(
+            status_code=400, detail=f"by must be distinct values from: {', '.join(STATS_DIMENSIONS)}."
+        )
+    agency_keys = [key.strip().upper() for key in agency]
+    if any(key not in snapshot.fleets for key in agency_keys):
+        raise HTTPException(status_code=404, detail="Agency not found.")
+    if year_from is not None and year_to is not None and year_from > year_to:
+        raise HTTPException(status_code=400, detail="yearFrom must not be greater than yearTo.")
+
+    counts = snapshot.stats.group_counts(
+        dimensions,
+        agencies=agency_keys,
+        propulsion_types=[_parse_propulsion_type(value) for value in propulsion_type],
+        year_from=year_from,
+        year_to=year_to,
+    )
+    return {"version": snapshot.version, "by": dimensions, **counts}
+
+
+class BatchLookupItem(BaseModel):
+    agency: str
+    bus_id: BusID = Field(..., alias="busId")
+
+
+class BatchIdRange(BaseModel):
+    start: int = Field(..., alias="from")
+    end: int = Field(..., alias="to")
+
+
+class BatchLookupRequest(BaseModel):
+    """Either explicit ``items``, or one ``agency`` with ``busIds`` and/or an ID ``range``.
+
+    Every lookup is made as of ``asOf``, today by default.
+    """
+
+    items: list[BatchLookupItem] | None = None
+    agency: str | None = None
+    bus_ids: list[BusID] | None = Field(None, alias="busIds")
+    id_range: BatchIdRange | None = Field(None, alias="range")
+    as_of: date | None = Field(None, alias="asOf")
+
+    def size(self) -> int:
+        """Number of lookups the batch expands to, validating its shape."""
+        if self.items is not None:
+            if self.agency is not None or self.bus_ids is not None or self.id_range is not None:
+                raise ValueError("Send either items or agency with busIds/range, not both.")
+            return len(self.items)
+        if self.agency is None:
+            raise ValueError("Batch needs items, or an agency with busIds/range.")
+        size = len(self.bus_ids or [])
+        if self.id_range is not None:
+            if self.id_range.start > self.id_range.end:
+                raise ValueError("Range start must not be greater than its end.")
+            size += self.id_range.end - self.id_range.start + 1
+        return size
+
+    def expand(self) -> list[tuple[str, BusID]]:
+        if self.items is not None:
+            return [(item.agency, item.bus_id) for item in self.items]
+        bus_ids: list[BusID] = list(self.bus_ids or [])
+        if self.id_range is not None:
+            bus_ids.extend(range(self.id_range.start, self.id_range.end + 1))
+        return [(self.agency, bus_id) for bus_id in bus_ids]
+
+
+@app.post("/api/fleet/batch")
+def get_fleet_specs(
+    batch: BatchLookupRequest = Body(...),
+    _: None = Depends(verify_request),
+) -> dict[str, Any]:
+    """Resolve many fleet numbers at once; results come back in input order with per-item status."""
+    try:
+        size = batch.size()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if size > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} lookups.")
+
+    snapshot = current_snapshot()
+    results: list[dict[str, Any]] = []
+    pending: list[tuple[int, int, AgencyFleet]] = []
+    for position, (agency, bus_id) in enumerate(batch.expand()):
+        agency_key = agency.strip().upper()
+        results.append({"agency": agency_key, "busId": bus_id})
+        agency_fleet = snapshot.fleets.get(agency_key)
+        if agency_fleet is None:
+            results[-1].update(status=404, detail="Agency not found.")
+            continue
+        try:
+            pending.append((_coerce_bus_id(bus_id), position, agency_fleet))
+        except ValueError as exc:
+            results[-1].update(status=400, detail=str(exc))
+
+    pending.sort(key=lambda entry: entry[0])
+    resolved = snapshot.coverage.lookup_sorted((key for key, _, _ in pending), _day(batch.as_of))
+    for (_, position, agency_fleet), matches in zip(pending, resolved):
+        status_code, body = resolve_lookup(agency_fleet, matches)
+        if status_code == 200:
+            results[position].update(status=200, **body)
+        else:
+            results[position].update(status=status_code, detail=body)
+
+    return {"results": results}
 
 def list_agencies() -> list[dict[str, str]]:
-    return [{"key": agency.key, "display_name": agency.display_name} for agency in AGENCY_FLEETS.values()]
+    return [_agency_ref(agency) for agency in current_snapshot().fleets.values()]
+
+
+def verify_admin(request: Request) -> None:
+    """Require the ``ADMIN_TOKEN`` bearer token; admin endpoints are off when it is unset."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    auth_header = request.headers.get("authorization") or ""
+    token = auth_header[7:].strip() if auth_header.lower().startswith("bearer ") else request.headers.get("x-admin-token")
+    if not token or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Unauthorized request.")
+
+
+def _snapshot_status(snapshot: FleetSnapshot) -> dict[str, Any]:
+    return {
+        "version": snapshot.version,
+        "source_digest": snapshot.source_digest,
+        "loaded_at": snapshot.loaded_at,
+        "agencies": len(snapshot.fleets),
+        "validation": None if snapshot.validation is None else dict(sorted(snapshot.validation.counts.items())),
+    }
+
+
+@app.get("/api/admin/fleet")
+def get_fleet_status(_: None = Depends(verify_admin)) -> dict[str, Any]:
+    return _snapshot_status(current_snapshot())
+
+
+@app.get("/api/admin/fleet/validation")
+def get_fleet_validation(_: None = Depends(verify_admin)) -> dict[str, Any]:
+    validation = current_snapshot().validation
+    if validation is None:
+        raise HTTPException(status_code=404, detail="Fleet data validation is off.")
+    return validation.to_dict()
+
+
+@app.post("/api/admin/fleet/reload")
+def post_fleet_reload(response: Response, _: None = Depends(verify_admin)) -> dict[str, Any]:
+    """Reload the fleet data and return the published snapshot's status.
+
+    Under serve.py the data is only checked here. The supervisor builds the
+    snapshot and replaces every worker, so the answer is 202 with the status
+    of the snapshot still being served.
+    """
+    try:
+        if SUPERVISOR_PID is None:
+            return _snapshot_status(reload_fleet_data())
+        check_fleet_source()
+    except (OSError, FleetDataError) as exc:
+        raise HTTPException(status_code=422, detail=f"Reload rejected: {exc}") from exc
+    os.kill(SUPERVISOR_PID, signal.SIGHUP)
+    response.status_code = 202
+    return _snapshot_status(current_snapshot())
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    """Prometheus scrape endpoint; only served when METRICS_ENABLED is set."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(metrics.render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
+
 
 @app.get("/")
-def root(request: Request):
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "agencies": list_agencies(),
-            "csrf_token": _get_csrf_token(request),
-            "allowed_domain": request.url.hostname,
-        },
-    )
+def root(request: Request) -> Response:
+    """Serve the pre-rendered page shell and hand the CSRF token to the page script in a cookie.
+
+    The cookie is readable from JavaScript, which echoes it in the X-CSRF-Token
+    header. In session mode it only transports the token; the server still
+    checks the header against the signed session.
+    """
+    csrf_token = _get_csrf_token(request)
+    with _phase("landing"):
+        response = current_snapshot().landing.respond(request)
+    if request.cookies.get(CSRF_COOKIE_NAME) != csrf_token:
+        response.set_cookie(
+            CSRF_COOKIE_NAME,
+            csrf_token,
+            max_age=CSRF_TOKEN_MAX_AGE,
+            samesite=SESSION_COOKIE_SAMESITE,
+            secure=SESSION_COOKIE_SECURE,
+        )
+    return response
 
 if __name__ == "__main__":
     import uvicorn
 
+    # Single-process development server; serve.py is the multi-worker entry point.
     uvicorn.run(app, host="127.0.0.1", port=8000)
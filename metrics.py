@@ -0,0 +1,153 @@
+"""Counters and histograms rendered in the Prometheus text exposition format.
+
+Deliberately small: labelled counters, fixed-bucket histograms and callback
+gauges, enough for ``/metrics`` without pulling in a client library. Every
+metric guards its series with its own lock, so updates from the threadpool
+and the event loop never lose counts. Values are per process.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+
+# Seconds. The hot path is mostly single-digit microseconds; the top buckets
+# catch template renders, reloads and anything stuck behind the GIL.
+DEFAULT_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 1.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    """Monotonic counter with one series per label-value tuple."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._series: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, values: tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._series[values] = self._series.get(values, 0) + amount
+
+    def value(self, values: tuple[str, ...] = ()) -> float:
+        return self._series.get(values, 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return [f"{self.name}{_format_labels(self.labels, values)} {_format_value(count)}" for values, count in series]
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed durations in seconds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: one count per bucket, one for +Inf, then the running sum.
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, values: tuple[str, ...], seconds: float) -> None:
+        slot = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [0] * (len(self.buckets) + 2)
+            series[slot] += 1
+            series[-1] += seconds
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = sorted((values, list(counts)) for values, counts in self._series.items())
+        lines: list[str] = []
+        bucket_labels = (*self.labels, "le")
+        for values, counts in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(bucket_labels, (*values, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def samples(self) -> list[str]:
+        return [f"{self.name} {_format_value(self.read())}"]
+
+
+class MetricsRegistry:
+    """Owns a set of metrics and renders them for a scrape."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Counter | Histogram | Gauge] = []
+
+    def _register(self, metric):
+        if any(existing.name == metric.name for existing in self._metrics):
+            raise ValueError(f"Metric {metric.name!r} is already registered.")
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, documentation, read))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            help_text = metric.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+            lines.append(f"# HELP {metric.name} {help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,314 @@
+"""Prefork production server.
+
+The supervisor imports ``main`` once, which loads, validates and indexes the
+fleet data, warms the lazily built parts of the snapshot and freezes the
+garbage collector. Then it binds the listening socket and forks ``--workers``
+uvicorn processes that share it. Workers inherit the snapshot copy-on-write.
+Frozen objects sit in the collector's permanent generation, so collections in
+a worker never traverse them and never write to their pages. Reference count
+changes still dirty the pages of objects a request touches, so expect some
+private growth per worker.
+
+Run from the repository root::
+
+    python serve.py --workers 4 --host 0.0.0.0 --port 8000
+
+Workers inherit ``SESSION_SECRET`` from the supervisor, so session cookies
+and CSRF tokens are valid on every worker. ``main`` generates a secret when
+none is set, but then every restart invalidates existing sessions.
+
+The supervisor replaces workers that die. It also rolls out new fleet data:
+
+* on SIGHUP, and when ``POST /api/admin/fleet/reload`` succeeds on any worker;
+* when the source changes, if ``FLEET_DATA_WATCH_INTERVAL`` is set. The
+  supervisor does the polling, not the workers.
+
+In each case the supervisor builds the new snapshot itself, forks a fresh set
+of workers and shuts the old ones down gracefully. SIGTERM or SIGINT stops
+the server.
+
+For each worker, memory (RSS, PSS and private bytes from
+``/proc/<pid>/smaps_rollup``) is logged every ``--stats-interval`` seconds.
+Each worker logs its request count and rate when it exits.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+# A worker that exits this soon after starting is restarted after a pause, not at once.
+CRASH_BACKOFF_SECONDS = 1.0
+
+
+def memory_usage(pid: int | str = "self") -> dict[str, int]:
+    """Return ``rss``, ``pss`` and ``private`` bytes for ``pid``, or ``{}`` where /proc has no smaps_rollup."""
+    fields: dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as fh:
+            for line in fh:
+                name, _, rest = line.partition(":")
+                if rest.strip().endswith("kB"):
+                    fields[name] = int(rest.split()[0]) * 1024
+    except OSError:
+        return {}
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def format_memory(usage: dict[str, int]) -> str:
+    return ", ".join(f"{name} {value / 2**20:.1f} MiB" for name, value in usage.items()) or "memory n/a"
+
+
+class RequestCounter:
+    """ASGI wrapper counting the HTTP requests a worker serves; the event loop is its only writer."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            self.requests += 1
+        await self.app(scope, receive, send)
+
+
+def _exit_with_supervisor(server: uvicorn.Server, supervisor: int) -> None:
+    """Shut the worker down if the supervisor dies without stopping it."""
+    while not server.should_exit:
+        if os.getppid() != supervisor:
+            logger.warning("Supervisor %d is gone, shutting down.", supervisor)
+            server.should_exit = True
+        time.sleep(1.0)
+
+
+def run_worker(main, sock: socket.socket, args: argparse.Namespace) -> None:
+    """Body of a forked worker: serve on the inherited socket until told to stop, then report."""
+    # uvicorn installs its own SIGTERM/SIGINT handlers while serving and re-raises
+    # the signal afterwards; ignoring it then lets the report below run.
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, signal.SIG_IGN)
+    supervisor = os.getppid()
+    main.SUPERVISOR_PID = supervisor
+    app = RequestCounter(main.app)
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            log_level=args.log_level,
+            access_log=False,
+            proxy_headers=False,
+            timeout_graceful_shutdown=args.graceful_timeout,
+        )
+    )
+    threading.Thread(target=_exit_with_supervisor, args=(server, supervisor), name="supervisor-watch", daemon=True).start()
+    started = time.monotonic()
+    server.run(sockets=[sock])
+    elapsed = max(time.monotonic() - started, 1e-9)
+    logger.info(
+        "Worker %d served %d requests in %.1fs (%.1f req/s); %s.",
+        os.getpid(),
+        app.requests,
+        elapsed,
+        app.requests / elapsed,
+        format_memory(memory_usage()),
+    )
+
+
+class Supervisor:
+    """Forks and replaces workers, and rolls them over when the fleet data is reloaded."""
+
+    def __init__(self, main, sock: socket.socket, args: argparse.Namespace) -> None:
+        self.main = main
+        self.sock = sock
+        self.args = args
+        self.workers: dict[int, float] = {}
+        self.retiring: dict[int, float] = {}
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.main, self.sock, self.args)
+            except BaseException:
+                logger.exception("Worker %d failed.", os.getpid())
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+
+    def freeze(self) -> None:
+        """Move every live object out of the collector's generations before the next fork."""
+        gc.collect()
+        gc.freeze()
+
+    def publish(self) -> None:
+        """Replace every worker with one forked from the supervisor's current snapshot."""
+        self.main.current_snapshot().warm()
+        self.freeze()
+        retired = self.workers
+        self.workers = {}
+        for _ in range(self.args.workers):
+            self.spawn()
+        for pid in retired:
+            self._signal(pid, signal.SIGTERM)
+            self.retiring[pid] = time.monotonic()
+        logger.info("Rolled %d workers onto fleet data version %s.", len(self.workers), self.main.current_snapshot().version)
+
+    def reload(self) -> None:
+        self.reload_requested = False
+        # The supervisor serves no requests, so it can build without collections, as at startup.
+        gc.disable()
+        try:
+            self.main.reload_fleet_data()
+        except (OSError, self.main.FleetDataError) as exc:
+            logger.warning("Fleet data reload failed, keeping version %s: %s", self.main.current_snapshot().version, exc)
+            return
+        except Exception:
+            logger.exception("Fleet data reload failed, keeping version %s.", self.main.current_snapshot().version)
+            return
+        finally:
+            gc.enable()
+        self.publish()
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.retiring.pop(pid, None)
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            logger.warning("Worker %d exited with status %d; starting a replacement.", pid, os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < CRASH_BACKOFF_SECONDS:
+                time.sleep(CRASH_BACKOFF_SECONDS)
+            self.spawn()
+
+    def log_memory(self) -> None:
+        for pid in sorted(self.workers):
+            logger.info("Worker %d: %s.", pid, format_memory(memory_usage(pid)))
+        logger.info("Supervisor %d: %s.", os.getpid(), format_memory(memory_usage()))
+
+    def _signal(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _request_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _request_reload(self, signum, frame) -> None:
+        self.reload_requested = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._request_reload)
+        self.main.current_snapshot().warm()
+        self.freeze()
+        for _ in range(self.args.workers):
+            self.spawn()
+        logger.info(
+            "Serving on %s:%d with %d workers, fleet data version %s.",
+            self.args.host,
+            self.args.port,
+            self.args.workers,
+            self.main.current_snapshot().version,
+        )
+
+        watch_interval = self.main.FLEET_DATA_WATCH_INTERVAL
+        last_seen: tuple[int, int] | None = None
+        next_watch = next_stats = time.monotonic()
+        while not self.stopping:
+            self.reap()
+            now = time.monotonic()
+            if self.reload_requested:
+                self.reload()
+            elif watch_interval > 0 and now >= next_watch:
+                next_watch = now + watch_interval
+                try:
+                    last_seen, snapshot = self.main.poll_fleet_source(last_seen)
+                except Exception:
+                    # The supervisor going down would take every worker with it.
+                    logger.exception("Fleet data reload failed, keeping version %s.", self.main.current_snapshot().version)
+                    snapshot = None
+                if snapshot is not None:
+                    self.publish()
+            if self.args.stats_interval > 0 and now >= next_stats:
+                next_stats = now + self.args.stats_interval
+                self.log_memory()
+            for pid, retired_at in list(self.retiring.items()):
+                if now - retired_at > self.args.graceful_timeout + 5:
+                    self._signal(pid, signal.SIGKILL)
+            time.sleep(0.2)
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        pids = [*self.workers, *self.retiring]
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while (self.workers or self.retiring) and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in [*self.workers, *self.retiring]:
+            self._signal(pid, signal.SIGKILL)
+        logger.info("Stopped.")
+
+
+def bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # An explicit IPPROTO_TCP lets asyncio set TCP_NODELAY on accepted connections;
+    # without it keep-alive responses stall on delayed ACKs.
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the app with N prefork workers sharing one fleet snapshot.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--graceful-timeout", type=float, default=10.0, help="seconds a stopping worker may finish requests")
+    parser.add_argument("--stats-interval", type=float, default=60.0, help="seconds between memory reports; 0 disables")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s"
+    )
+
+    # Keep collections from running while the snapshot is built; everything
+    # allocated so far is frozen before the first fork.
+    gc.disable()
+    import main as app_module
+
+    gc.enable()
+    sock = bind(args.host, args.port)
+    Supervisor(app_module, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,7 @@ const el = {
     resetBtn: $('resetBtn'),
     agency: $('agency'),
     busId: $('busId'),
+    busIdSuggestions: $('busIdSuggestions'),
     headline: $('headline'),
     year: $('year'),
     length: $('length'),
@@ -27,7 +28,13 @@ const el = {
 }
 
 const tokenMeta = document.querySelector('meta[name="csrf-token"]')
-const CSRF_TOKEN = tokenMeta?.content || null
+const readCookie = (name) =>
+    document.cookie
+        .split('; ')
+        .find((part) => part.startsWith(`${name}=`))
+        ?.slice(name.length + 1) || null
+// The cached page shell ships an empty meta tag; the token arrives in a cookie.
+const CSRF_TOKEN = tokenMeta?.content || readCookie(tokenMeta?.dataset.cookie || 'csrftoken')
 const CSRF_HEADERS = CSRF_TOKEN ? { 'X-CSRF-Token': CSRF_TOKEN } : {}
 
 const DOT = 'h-2.5 w-2.5 rounded-full ring-2 ring-white/20 shadow-sm'
@@ -218,6 +225,35 @@ const normalizeSuggestions = (detail) => {
 
 const normalizeAlsoFound = (payload) => normalizeAgencyList(payload)
 
+const SUGGEST_DELAY_MS = 150
+let suggestTimer = null
+let suggestAbort = null
+
+const renderSuggestions = (results) => {
+    if (!el.busIdSuggestions) return
+    el.busIdSuggestions.innerHTML = ''
+    results.forEach((item) => {
+        const spec = item?.spec || {}
+        const option = document.createElement('option')
+        option.value = String(item.first_match)
+        option.label = [item.display_name ?? item.agency, spec.year, spec.make, spec.model].filter(Boolean).join(' · ')
+        el.busIdSuggestions.appendChild(option)
+    })
+}
+
+async function fetchSuggestions(q) {
+    suggestAbort?.abort()
+    suggestAbort = new AbortController()
+    const url = `/api/fleet/suggest?q=${encodeURIComponent(q)}&agency=${encodeURIComponent(el.agency.value)}&limit=8`
+    try {
+        const res = await fetch(url, { headers: CSRF_HEADERS, referrerPolicy: 'same-origin', signal: suggestAbort.signal })
+        const body = res.ok ? await res.json() : null
+        renderSuggestions(Array.isArray(body?.results) ? body.results : [])
+    } catch (err) {
+        if (err?.name !== 'AbortError') renderSuggestions([])
+    }
+}
+
 async function fetchFleetSpec({ agency, busId }) {
     const url = `/api/fleet?agency=${encodeURIComponent(agency)}&busId=${encodeURIComponent(busId)}`
     const res = await fetch(url, {
@@ -295,8 +331,16 @@ el.lookupForm.addEventListener('submit', async (e) => {
     }
 })
 
+el.busId.addEventListener('input', () => {
+    clearTimeout(suggestTimer)
+    const q = el.busId.value.trim()
+    if (!/^\d+$/.test(q) || !CSRF_TOKEN) return renderSuggestions([])
+    suggestTimer = setTimeout(() => fetchSuggestions(q), SUGGEST_DELAY_MS)
+})
+
 el.resetBtn.addEventListener('click', () => {
     clearNotice()
+    renderSuggestions([])
     el.agency.selectedIndex = 0
     el.busId.value = ''
 
@@ -0,0 +1,216 @@
+"""Checks of the fleet data layer against a linear scan of the declared ranges.
+
+Run from the repository root::
+
+    python -m pytest tests
+"""
+
+import pickle
+import random
+import sys
+from array import array
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fleetdata import (  # noqa: E402
+    AgencyFleet,
+    CoverageIndex,
+    FleetRange,
+    FleetSpec,
+    FleetStore,
+    PrefixIndex,
+    PropulsionType,
+    dump_store_objects,
+    encode_fleets,
+    fleet_number_key,
+    load_fleet_store,
+    load_store_objects,
+    parse_fleet_source,
+    today,
+)
+
+BASE_DAY = date(2000, 1, 1).toordinal()
+SPECS = [
+    FleetSpec(2010, "Gillig", "Low Floor", PropulsionType.DIESEL, "BRT", 40),
+    FleetSpec(2021, "New Flyer", "XE40", PropulsionType.BATTERY_ELECTRIC, length_ft=40),
+    FleetSpec(None, "Nova Bus", "LFS", PropulsionType.CNG, display_name="Nova LFS"),
+]
+
+
+def random_date(rng: random.Random) -> date | None:
+    return date.fromordinal(BASE_DAY + rng.randint(0, 9000)) if rng.random() < 0.6 else None
+
+
+def random_ranges(rng: random.Random, count: int) -> list[FleetRange]:
+    ranges = []
+    for _ in range(count):
+        lo = rng.randint(0, 300)
+        ranges.append(
+            FleetRange(lo, lo + rng.randint(0, 40), rng.choice(SPECS), random_date(rng), random_date(rng))
+        )
+    return ranges
+
+
+def random_fleets(seed: int) -> list[AgencyFleet]:
+    rng = random.Random(seed)
+    return [AgencyFleet(f"A{i}", f"Agency {i}", random_ranges(rng, rng.randint(0, 15))) for i in range(4)]
+
+
+def scan(ranges, bus_id: int, day: int) -> FleetRange | None:
+    """The first declared range holding ``bus_id`` on ``day``, as a top-to-bottom read of the source would find."""
+    for r in ranges:
+        first, last = r.service_days
+        if fleet_number_key(r.lo) <= bus_id <= fleet_number_key(r.hi) and first <= day < last:
+            return r
+    return None
+
+
+def sample_days(seed: int) -> list[int]:
+    rng = random.Random(seed)
+    return [BASE_DAY + rng.randint(-100, 9200) for _ in range(12)]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fleet_index_matches_scan(seed):
+    for fleet in random_fleets(seed):
+        for day in sample_days(seed):
+            for bus_id in range(-1, 345):
+                assert fleet.index.lookup(bus_id, day) is scan(fleet.ranges, bus_id, day)
+        for bus_id in range(-1, 345):
+            assert fleet.index.lookup(bus_id) is scan(fleet.ranges, bus_id, today())
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_coverage_index_matches_scan(seed):
+    fleets = random_fleets(seed)
+    coverage = CoverageIndex(fleets)
+
+    def expected(bus_id, day):
+        found = ((fleet, scan(fleet.ranges, bus_id, day)) for fleet in fleets)
+        return [(fleet.key, r) for fleet, r in found if r is not None]
+
+    for day in sample_days(seed):
+        for bus_id in range(-1, 345):
+            assert [(fleet.key, r) for fleet, r in coverage.lookup(bus_id, day)] == expected(bus_id, day)
+        bus_ids = sorted(random.Random(seed).sample(range(-1, 345), 60))
+        assert list(coverage.lookup_sorted(bus_ids, day)) == [coverage.lookup(b, day) for b in bus_ids]
+    for bus_id in range(-1, 345):
+        assert [(fleet.key, r) for fleet, r in coverage.lookup(bus_id)] == expected(bus_id, today())
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_prefix_index_lists_ranges_in_service(seed):
+    fleets = random_fleets(seed)
+    for day in sample_days(seed):
+        prefixes = PrefixIndex(fleets, cap=1000, day=day)
+        assert prefixes.covers(day)
+        for prefix in ("1", "2", "10", "25", "300"):
+            expected = {
+                id(r)
+                for fleet in fleets
+                for bus_id in range(345)
+                if str(bus_id).startswith(prefix) and (r := scan(fleet.ranges, bus_id, day)) is not None
+            }
+            assert {id(entry[5]) for entry in prefixes.search(prefix, 1000)} == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_store_round_trip(seed, tmp_path):
+    fleets = random_fleets(seed)
+    path = tmp_path / "fleets.bin"
+    path.write_bytes(encode_fleets(fleets))
+    store = FleetStore(path)
+
+    assert list(store) == [fleet.key for fleet in fleets]
+    for fleet in fleets:
+        loaded = store[fleet.key]
+        assert loaded.display_name == fleet.display_name
+        assert list(loaded.ranges) == list(fleet.ranges)
+        assert [(r.spec, r.in_service, r.retired) for r in loaded.ranges] == [
+            (r.spec, r.in_service, r.retired) for r in fleet.ranges
+        ]
+        for day in sample_days(seed):
+            for bus_id in range(-1, 345):
+                assert loaded.index.lookup(bus_id, day) == scan(fleet.ranges, bus_id, day)
+    coverage = CoverageIndex(store.values())
+    for bus_id in range(-1, 345):
+        assert [(a.key, r) for a, r in coverage.lookup(bus_id)] == [
+            (a.key, r) for a, r in CoverageIndex(fleets).lookup(bus_id)
+        ]
+
+
+def test_store_from_memory_matches_mapped(tmp_path):
+    fleets = random_fleets(3)
+    blob = encode_fleets(fleets)
+    (tmp_path / "fleets.bin").write_bytes(blob)
+    mapped, held = FleetStore(tmp_path / "fleets.bin"), FleetStore(tmp_path / "missing.bin", blob)
+    for fleet in fleets:
+        assert list(held[fleet.key].ranges) == list(mapped[fleet.key].ranges)
+
+
+def test_unwritable_artifact_is_served_from_memory(tmp_path):
+    source = tmp_path / "fleets.json"
+    source.write_text(
+        '{"agencies": [{"key": "X", "ranges": [{"lo": 1, "hi": 9, "year": 2020, "make": "M",'
+        ' "model": "N", "propulsion_type": "Diesel"}]}]}'
+    )
+    store = load_fleet_store(source, tmp_path / "missing" / "fleets.bin")
+    assert store["X"].index.lookup(5).spec.make == "M"
+    assert list(tmp_path.iterdir()) == [source]
+
+
+def test_parse_rejects_wrong_types():
+    document = '{"agencies": [{"key": "X", "ranges": [{"lo": 1, "hi": 9, "year": "2020", "make": "M",'
+    document += ' "model": "N", "propulsion_type": "Diesel"}]}]}'
+    with pytest.raises(ValueError, match="X range #0 .* 'year'"):
+        parse_fleet_source(document)
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "fleets.bin"
+    path.write_bytes(encode_fleets(random_fleets(7)))
+    return FleetStore(path)
+
+
+def test_store_objects_round_trip(store, tmp_path):
+    agencies = list(store.values())
+    prefixes = PrefixIndex(agencies, cap=10)
+    obj = {
+        "agency": agencies[1],
+        "range": store.range_at(2),
+        "numbers": array("q", [1, 2, 3]),
+        "buffer": pickle.PickleBuffer(bytearray(b"abcdefgh")),
+        "prefixes": prefixes,
+    }
+    path = tmp_path / "snapshot.bin"
+    dump_store_objects(path, store, b"key", obj)
+
+    loaded = load_store_objects(path, store, b"key", (PrefixIndex,))
+    assert loaded["agency"] is agencies[1]
+    assert loaded["range"] is store.range_at(2)
+    assert loaded["numbers"] == array("q", [1, 2, 3])
+    assert bytes(loaded["buffer"]) == b"abcdefgh"
+    assert loaded["prefixes"].search("1", 10) == prefixes.search("1", 10)
+
+
+def test_store_objects_key_mismatch_or_missing_file(store, tmp_path):
+    path = tmp_path / "snapshot.bin"
+    dump_store_objects(path, store, b"key", {"value": 1})
+    assert load_store_objects(path, store, b"other key") is None
+    assert load_store_objects(tmp_path / "missing.bin", store, b"key") is None
+
+
+class _NotAllowed:
+    pass
+
+
+def test_store_objects_reject_unlisted_globals(store, tmp_path):
+    path = tmp_path / "snapshot.bin"
+    dump_store_objects(path, store, b"key", [_NotAllowed()])
+    with pytest.raises(pickle.UnpicklingError, match="not allowed"):
+        load_store_objects(path, store, b"key")